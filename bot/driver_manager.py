@@ -4,21 +4,31 @@ import hashlib
 import json
 import logging
 import platform
+import random
 import re
 import shutil
 import stat
 import subprocess
 import tempfile
+import time
 import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import cache, lru_cache
 from pathlib import Path
 from typing import Any
-from urllib.error import URLError
-from urllib.request import urlopen
+
+import urllib3
+from urllib3.util.retry import Retry
 
 from config import DriverSettings
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logging.getLogger("tsp.driver")
 
@@ -26,6 +36,31 @@ _CFT_MILESTONES_URL = (
     "https://googlechromelabs.github.io/chrome-for-testing/"
     "latest-versions-per-milestone-with-downloads.json"
 )
+# Mirrors Selenium Manager's TTL for cached browser discovery results.
+_BROWSER_VERSION_TTL_SECONDS = 3600
+_SYSTEM = platform.system().lower()
+_MACHINE = platform.machine().lower()
+_VERSION_RE = re.compile(r"(\d+)\.")
+_SHA256_RE = re.compile(r"(?i)[0-9a-f]{64}")
+_COPY_BUFFER_SIZE = 64 * 1024
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# One pool for CfT metadata and driver downloads, so TLS sessions to each host
+# are reused across preflight, metadata fetch and download retries.
+_HTTP_POOL = urllib3.PoolManager(maxsize=4, retries=Retry(total=3, backoff_factor=0.3))
+# Cached CfT metadata younger than this is used without revalidation.
+_CFT_METADATA_FRESH_SECONDS = 3600
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_pretty(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
 
 
 class BrowserNotFoundError(RuntimeError):
@@ -56,17 +91,120 @@ class DriverResolution:
     used_selenium_manager: bool
 
 
+def _compute_current_target() -> PlatformTarget | None:
+    if _SYSTEM == "darwin":
+        arch = "arm64" if "arm" in _MACHINE else "x64"
+        cft_platform = "mac-arm64" if arch == "arm64" else "mac-x64"
+        return PlatformTarget("mac", arch, cft_platform, "chromedriver")
+
+    if _SYSTEM == "linux":
+        return PlatformTarget("linux", "x64", "linux64", "chromedriver")
+
+    if _SYSTEM == "windows":
+        arch = "x64" if any(token in _MACHINE for token in ("amd64", "x86_64", "x64")) else "x86"
+        cft_platform = "win64" if arch == "x64" else "win32"
+        return PlatformTarget("win", arch, cft_platform, "chromedriver.exe")
+
+    return None
+
+
+# The process never changes platform. None means an unsupported OS, which is
+# reported from resolve_driver rather than failing the import.
+CURRENT_TARGET: PlatformTarget | None = _compute_current_target()
+
+
+def _extract_major(version_output: str, name: str) -> int:
+    match = _VERSION_RE.search(version_output)
+    if not match:
+        raise RuntimeError(f"Failed to determine major version for {name}: {version_output}")
+    return int(match.group(1))
+
+
+def _binary_mtime_ns(binary: str) -> int | None:
+    try:
+        return Path(binary).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _probe_browser_major(binary: str, mtime_ns: int | None, ttl_bucket: int) -> int:
+    # mtime_ns and ttl_bucket are part of the cache key only: a browser upgrade
+    # or TTL expiry produces a new key and forces a fresh probe.
+    try:
+        completed = subprocess.run(
+            [binary, "--version"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return _extract_major(completed.stdout.strip() or completed.stderr.strip(), "browser")
+    except (subprocess.SubprocessError, OSError) as exc:
+        raise BrowserNotFoundError(f"Failed to get browser version: {exc}") from exc
+
+
+def _browser_install_hint(system: str) -> str:
+    if system == "darwin":
+        return "Install Google Chrome: brew install --cask google-chrome"
+    if system == "linux":
+        return "Install Google Chrome/Chromium using your OS package manager."
+    if system == "windows":
+        return "Install Google Chrome from https://www.google.com/chrome/"
+    return "Install Google Chrome or Chromium and restart the bot."
+
+
+@lru_cache(maxsize=1)
+def _locate_browser_binary(chrome_binary: str | None, system: str) -> str:
+    # Raising keeps misses out of the cache, so a browser installed later is
+    # still picked up on the next call.
+    if chrome_binary:
+        binary = Path(chrome_binary)
+        if binary.exists():
+            return str(binary)
+
+    for candidate in DriverManager._browser_candidates_for_system():
+        resolved = shutil.which(candidate)
+        if resolved:
+            return resolved
+        candidate_path = Path(candidate)
+        if candidate_path.exists():
+            return str(candidate_path)
+
+    raise BrowserNotFoundError(_browser_install_hint(system))
+
+
 class DriverManager:
     def __init__(self, settings: DriverSettings) -> None:
         self.settings = settings
         self.chromedriver_dir = settings.chromedriver_dir
         self.chromedriver_dir.mkdir(parents=True, exist_ok=True)
+        self._metadata_cache: dict[str, Any] | None = None
 
     def preflight(self) -> DriverResolution:
         return self.resolve_driver(force_refresh=False)
 
     def resolve_driver(self, *, force_refresh: bool) -> DriverResolution:
+        if force_refresh:
+            self.invalidate()
         browser_binary = self._resolve_browser_binary()
+        browser_mtime_ns = _binary_mtime_ns(browser_binary)
+
+        target = self._current_target()
+        destination = self.chromedriver_dir / target.folder_name / target.executable_name
+
+        if not force_refresh and not self.settings.chromedriver_path_override and destination.exists():
+            cached = self._cached_resolution(target, destination, browser_binary, browser_mtime_ns)
+            if cached is not None:
+                return cached
+
+        # On a cold path the CfT metadata is needed anyway, so fetch it while
+        # the browser `--version` subprocess runs.
+        metadata_future: Future[dict[str, Any]] | None = None
+        if not self.settings.chromedriver_path_override and (force_refresh or not destination.exists()):
+            prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tsp-cft-prefetch")
+            metadata_future = prefetch_executor.submit(self._fetch_cft_metadata)
+            prefetch_executor.shutdown(wait=False)
+
         browser_major = self._browser_major_version(browser_binary)
 
         if self.settings.chromedriver_path_override:
@@ -79,13 +217,18 @@ class DriverManager:
                     used_selenium_manager=False,
                 )
 
-        target = self._current_target()
-        destination = self.chromedriver_dir / target.folder_name / target.executable_name
         destination.parent.mkdir(parents=True, exist_ok=True)
 
         if not force_refresh and destination.exists():
             current_major = self._driver_major_version(destination)
             if current_major == browser_major:
+                self._write_metadata(
+                    destination=destination,
+                    browser_major=browser_major,
+                    platform_name=target.cft_platform,
+                    browser_binary=browser_binary,
+                    browser_mtime_ns=browser_mtime_ns,
+                )
                 return DriverResolution(
                     driver_path=destination,
                     browser_binary=browser_binary,
@@ -94,12 +237,14 @@ class DriverManager:
                 )
 
         try:
-            self._download_and_install_for_major(browser_major, target, destination)
-            installed_major = self._driver_major_version(destination)
-            if installed_major != browser_major:
-                raise DriverInstallError(
-                    f"Installed driver major version is {installed_major}, expected {browser_major}."
-                )
+            self._download_and_install_for_major(
+                browser_major,
+                target,
+                destination,
+                browser_binary=browser_binary,
+                browser_mtime_ns=browser_mtime_ns,
+                metadata=metadata_future.result() if metadata_future is not None else None,
+            )
             return DriverResolution(
                 driver_path=destination,
                 browser_binary=browser_binary,
@@ -119,70 +264,75 @@ class DriverManager:
             )
 
     def browser_install_hint(self) -> str:
-        system = platform.system().lower()
-        if system == "darwin":
-            return "Install Google Chrome: brew install --cask google-chrome"
-        if system == "linux":
-            return "Install Google Chrome/Chromium using your OS package manager."
-        if system == "windows":
-            return "Install Google Chrome from https://www.google.com/chrome/"
-        return "Install Google Chrome or Chromium and restart the bot."
+        return _browser_install_hint(_SYSTEM)
+
+    def invalidate(self) -> None:
+        self._metadata_cache = None
+        _locate_browser_binary.cache_clear()
+        _probe_browser_major.cache_clear()
 
     def _resolve_browser_binary(self) -> str:
-        if self.settings.chrome_binary:
-            binary = Path(self.settings.chrome_binary)
-            if binary.exists():
-                return str(binary)
-
-        candidates = self._browser_candidates_for_system()
-        for candidate in candidates:
-            resolved = shutil.which(candidate)
-            if resolved:
-                return resolved
-            candidate_path = Path(candidate)
-            if candidate_path.exists():
-                return str(candidate_path)
-
-        raise BrowserNotFoundError(self.browser_install_hint())
+        return _locate_browser_binary(self.settings.chrome_binary, _SYSTEM)
 
     @staticmethod
-    def _browser_candidates_for_system() -> list[str]:
-        system = platform.system().lower()
+    @cache
+    def _browser_candidates_for_system() -> tuple[str, ...]:
+        system = _SYSTEM
         if system == "darwin":
-            return [
+            return (
                 "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
                 "/Applications/Chromium.app/Contents/MacOS/Chromium",
                 "google-chrome",
                 "chromium",
-            ]
+            )
         if system == "linux":
-            return ["google-chrome", "google-chrome-stable", "chromium-browser", "chromium"]
+            return ("google-chrome", "google-chrome-stable", "chromium-browser", "chromium")
         if system == "windows":
-            return [
+            return (
                 "chrome",
                 r"C:\\Program Files\\Google\\Chrome\\Application\\chrome.exe",
                 r"C:\\Program Files (x86)\\Google\\Chrome\\Application\\chrome.exe",
-            ]
-        return ["google-chrome", "chromium"]
+            )
+        return ("google-chrome", "chromium")
 
     @staticmethod
     def _extract_major(version_output: str, name: str) -> int:
-        match = re.search(r"(\d+)\.", version_output)
-        if not match:
-            raise RuntimeError(f"Failed to determine major version for {name}: {version_output}")
-        return int(match.group(1))
+        return _extract_major(version_output, name)
 
-    def _browser_major_version(self, binary: str) -> int:
-        try:
-            completed = subprocess.run(
-                [binary, "--version"],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-            return self._extract_major(completed.stdout.strip() or completed.stderr.strip(), "browser")
-        except (subprocess.SubprocessError, OSError) as exc:
-            raise BrowserNotFoundError(f"Failed to get browser version: {exc}") from exc
+    @staticmethod
+    def _browser_major_version(binary: str) -> int:
+        ttl_bucket = int(time.time() // _BROWSER_VERSION_TTL_SECONDS)
+        return _probe_browser_major(binary, _binary_mtime_ns(binary), ttl_bucket)
+
+    def _cached_resolution(
+        self,
+        target: PlatformTarget,
+        destination: Path,
+        browser_binary: str,
+        browser_mtime_ns: int | None,
+    ) -> DriverResolution | None:
+        # Warm start: metadata recorded for the same browser binary and mtime
+        # lets us skip both `--version` subprocesses.
+        if browser_mtime_ns is None:
+            return None
+        record = self._read_metadata().get("drivers", {}).get(target.cft_platform)
+        if not isinstance(record, dict):
+            return None
+        if (
+            record.get("path") != str(destination)
+            or record.get("browser_binary") != browser_binary
+            or record.get("browser_binary_mtime_ns") != browser_mtime_ns
+        ):
+            return None
+        browser_major = record.get("browser_major")
+        if not isinstance(browser_major, int):
+            return None
+        return DriverResolution(
+            driver_path=destination,
+            browser_binary=browser_binary,
+            browser_major=browser_major,
+            used_selenium_manager=False,
+        )
 
     def _driver_major_version(self, driver: Path) -> int:
         try:
@@ -198,35 +348,35 @@ class DriverManager:
 
     @staticmethod
     def _current_target() -> PlatformTarget:
-        system = platform.system().lower()
-        machine = platform.machine().lower()
-
-        if system == "darwin":
-            arch = "arm64" if "arm" in machine else "x64"
-            cft_platform = "mac-arm64" if arch == "arm64" else "mac-x64"
-            return PlatformTarget("mac", arch, cft_platform, "chromedriver")
-
-        if system == "linux":
-            return PlatformTarget("linux", "x64", "linux64", "chromedriver")
-
-        if system == "windows":
-            arch = "x64" if any(token in machine for token in ("amd64", "x86_64", "x64")) else "x86"
-            cft_platform = "win64" if arch == "x64" else "win32"
-            return PlatformTarget("win", arch, cft_platform, "chromedriver.exe")
-
-        raise DriverInstallError(f"Unsupported OS: {system}")
+        if CURRENT_TARGET is None:
+            raise DriverInstallError(f"Unsupported OS: {_SYSTEM}")
+        return CURRENT_TARGET
 
     def _download_and_install_for_major(
         self,
         browser_major: int,
         target: PlatformTarget,
         destination: Path,
+        *,
+        browser_binary: str,
+        browser_mtime_ns: int | None,
+        metadata: dict[str, Any] | None = None,
     ) -> None:
-        metadata = self._fetch_json(_CFT_MILESTONES_URL)
+        if metadata is None:
+            metadata = self._fetch_cft_metadata()
         milestones = metadata.get("milestones", {})
         milestone = milestones.get(str(browser_major))
         if not milestone:
             raise DriverInstallError(f"No Chrome for Testing data for major version {browser_major}.")
+        milestone_version = milestone.get("version")
+        # The archive is sha256-verified, so the milestone version is trusted as
+        # the installed driver version instead of running `chromedriver --version`.
+        if isinstance(milestone_version, str):
+            driver_major = _extract_major(milestone_version, "driver")
+            if driver_major != browser_major:
+                raise DriverInstallError(
+                    f"Chrome for Testing lists driver major version {driver_major}, expected {browser_major}."
+                )
 
         downloads = milestone.get("downloads", {}).get("chromedriver", [])
         selected = next((item for item in downloads if item.get("platform") == target.cft_platform), None)
@@ -243,19 +393,18 @@ class DriverManager:
         with tempfile.TemporaryDirectory(prefix="tsp-driver-") as tmp_dir_name:
             tmp_dir = Path(tmp_dir_name)
             archive_path = tmp_dir / "chromedriver.zip"
-            self._download_with_retries(download_url, archive_path)
-            self._verify_sha256_or_raise(archive_path, archive_sha256)
-
-            with zipfile.ZipFile(archive_path, "r") as archive:
-                archive.extractall(tmp_dir)
-
-            extracted = self._find_extracted_binary(tmp_dir, target.executable_name)
-            if not extracted:
-                raise DriverInstallError("chromedriver binary not found after archive extraction.")
+            actual_sha256 = self._download_with_retries(download_url, archive_path)
+            self._verify_sha256_or_raise(actual_sha256, archive_sha256)
 
             final_tmp = destination.with_suffix(destination.suffix + ".tmp")
             final_tmp.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(extracted, final_tmp)
+            with zipfile.ZipFile(archive_path, "r") as archive:
+                member = self._find_archive_member(archive, target)
+                if not member:
+                    raise DriverInstallError("chromedriver binary not found in the downloaded archive.")
+                with archive.open(member) as src, final_tmp.open("wb") as dst:
+                    shutil.copyfileobj(src, dst, length=_COPY_BUFFER_SIZE)
+
             if target.executable_name == "chromedriver":
                 final_tmp.chmod(final_tmp.stat().st_mode | stat.S_IEXEC)
             final_tmp.replace(destination)
@@ -263,27 +412,52 @@ class DriverManager:
         self._write_metadata(
             destination=destination,
             browser_major=browser_major,
-            source_url=download_url,
             platform_name=target.cft_platform,
+            browser_binary=browser_binary,
+            browser_mtime_ns=browser_mtime_ns,
+            source_url=download_url,
             archive_sha256=archive_sha256,
         )
 
+    def _fetch_cft_metadata(self) -> dict[str, Any]:
+        return self._fetch_json(_CFT_MILESTONES_URL, cache_path=self.chromedriver_dir / "cft-milestones.json")
+
     @staticmethod
-    def _find_extracted_binary(tmp_dir: Path, executable_name: str) -> Path | None:
-        for path in tmp_dir.rglob(executable_name):
-            if path.is_file():
-                return path
+    def _find_archive_member(archive: zipfile.ZipFile, target: PlatformTarget) -> str | None:
+        # CfT archives use a fixed layout: chromedriver-<platform>/<executable>.
+        expected = f"chromedriver-{target.cft_platform}/{target.executable_name}"
+        try:
+            archive.getinfo(expected)
+            return expected
+        except KeyError:
+            pass
+
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.rsplit("/", 1)[-1] == target.executable_name:
+                return info.filename
         return None
 
     @staticmethod
-    def _download_with_retries(url: str, destination: Path, retries: int = 3) -> None:
+    def _download_with_retries(url: str, destination: Path, retries: int = 3) -> str:
         last_error: Exception | None = None
-        for _ in range(retries):
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(min(8.0, 0.5 * (2 ** (attempt - 1))) + random.random() * 0.25)
             try:
-                with urlopen(url, timeout=30) as response:
-                    destination.write_bytes(response.read())
-                return
-            except (URLError, TimeoutError, OSError) as exc:
+                digest = hashlib.sha256()
+                # Retries are owned by this loop, which also covers failures mid-body.
+                response = _HTTP_POOL.request("GET", url, preload_content=False, retries=False, timeout=30.0)
+                try:
+                    if response.status != 200:
+                        raise urllib3.exceptions.HTTPError(f"HTTP {response.status} for {url}")
+                    with destination.open("wb") as fh:
+                        while chunk := response.read(_DOWNLOAD_CHUNK_SIZE):
+                            digest.update(chunk)
+                            fh.write(chunk)
+                finally:
+                    response.release_conn()
+                return digest.hexdigest()
+            except (urllib3.exceptions.HTTPError, OSError) as exc:
                 last_error = exc
         raise DriverInstallError(f"Failed to download driver after {retries} attempts: {last_error}")
 
@@ -291,20 +465,12 @@ class DriverManager:
     def _extract_sha256(download_item: dict[str, Any]) -> str | None:
         for key in ("sha256", "sha_256", "checksum"):
             value = download_item.get(key)
-            if isinstance(value, str) and re.fullmatch(r"[a-fA-F0-9]{64}", value):
+            if isinstance(value, str) and _SHA256_RE.fullmatch(value):
                 return value.lower()
         return None
 
     @staticmethod
-    def _sha256_file(path: Path) -> str:
-        digest = hashlib.sha256()
-        with path.open("rb") as fh:
-            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
-                digest.update(chunk)
-        return digest.hexdigest()
-
-    def _verify_sha256_or_raise(self, path: Path, expected_sha256: str) -> None:
-        actual_sha256 = self._sha256_file(path)
+    def _verify_sha256_or_raise(actual_sha256: str, expected_sha256: str) -> None:
         expected = expected_sha256.lower()
         if actual_sha256 != expected:
             raise DriverInstallError(
@@ -313,39 +479,132 @@ class DriverManager:
             )
 
     @staticmethod
-    def _fetch_json(url: str) -> dict[str, Any]:
+    def _fetch_json(url: str, *, cache_path: Path | None = None) -> dict[str, Any]:
+        if cache_path is None:
+            try:
+                response = _HTTP_POOL.request("GET", url, timeout=20.0)
+                if response.status != 200:
+                    raise urllib3.exceptions.HTTPError(f"HTTP {response.status} for {url}")
+                return _json_loads(response.data)
+            except Exception as exc:
+                raise DriverInstallError(f"Failed to fetch Chrome for Testing metadata: {exc}") from exc
+
+        meta_path = cache_path.with_name(cache_path.name + ".meta")
+        cache_meta: dict[str, Any] = {}
+        if cache_path.exists() and meta_path.exists():
+            try:
+                loaded_meta = _json_loads(meta_path.read_bytes())
+                if isinstance(loaded_meta, dict):
+                    cache_meta = loaded_meta
+            except (ValueError, OSError):
+                cache_meta = {}
+
+        def _read_cached() -> dict[str, Any] | None:
+            try:
+                return _json_loads(cache_path.read_bytes())
+            except (ValueError, OSError):
+                return None
+
+        fetched_at = cache_meta.get("fetched_at")
+        if isinstance(fetched_at, (int, float)) and time.time() - fetched_at < _CFT_METADATA_FRESH_SECONDS:
+            cached = _read_cached()
+            if cached is not None:
+                return cached
+
+        headers: dict[str, str] = {}
+        if cache_meta.get("etag"):
+            headers["If-None-Match"] = str(cache_meta["etag"])
+        if cache_meta.get("last_modified"):
+            headers["If-Modified-Since"] = str(cache_meta["last_modified"])
+
         try:
-            with urlopen(url, timeout=20) as response:
-                return json.loads(response.read().decode("utf-8"))
+            response = _HTTP_POOL.request("GET", url, headers=headers, timeout=20.0)
         except Exception as exc:
             raise DriverInstallError(f"Failed to fetch Chrome for Testing metadata: {exc}") from exc
 
+        if response.status == 304:
+            cached = _read_cached()
+            if cached is None:
+                raise DriverInstallError("Chrome for Testing metadata returned 304 but the local cache is unreadable.")
+            cache_meta["fetched_at"] = time.time()
+            DriverManager._write_json_cache_meta(meta_path, cache_meta)
+            return cached
+        if response.status != 200:
+            raise DriverInstallError(f"Failed to fetch Chrome for Testing metadata: HTTP {response.status}")
+
+        body = response.data
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        try:
+            payload = _json_loads(body)
+        except ValueError as exc:
+            raise DriverInstallError(f"Failed to fetch Chrome for Testing metadata: {exc}") from exc
+
+        try:
+            tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+            tmp_path.write_bytes(body)
+            tmp_path.replace(cache_path)
+            DriverManager._write_json_cache_meta(
+                meta_path,
+                {"etag": etag, "last_modified": last_modified, "fetched_at": time.time()},
+            )
+        except OSError as exc:
+            logger.warning("Failed to cache Chrome for Testing metadata: %s", exc)
+        return payload
+
+    @staticmethod
+    def _write_json_cache_meta(meta_path: Path, cache_meta: dict[str, Any]) -> None:
+        try:
+            meta_path.write_text(json.dumps(cache_meta), encoding="utf-8")
+        except OSError as exc:
+            logger.warning("Failed to write metadata cache info %s: %s", meta_path, exc)
+
+    def _read_metadata(self) -> dict[str, Any]:
+        if self._metadata_cache is not None:
+            return self._metadata_cache
+
+        metadata_path = self.chromedriver_dir / "metadata.json"
+        metadata: Any = {}
+        if metadata_path.exists():
+            try:
+                metadata = _json_loads(metadata_path.read_bytes())
+            except (ValueError, OSError):
+                metadata = {}
+        self._metadata_cache = metadata if isinstance(metadata, dict) else {}
+        return self._metadata_cache
+
     def _write_metadata(
         self,
         *,
         destination: Path,
         browser_major: int,
-        source_url: str,
         platform_name: str,
-        archive_sha256: str,
+        browser_binary: str,
+        browser_mtime_ns: int | None,
+        source_url: str | None = None,
+        archive_sha256: str | None = None,
     ) -> None:
         metadata_path = self.chromedriver_dir / "metadata.json"
-        metadata: dict[str, Any]
-        if metadata_path.exists():
-            try:
-                metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
-            except json.JSONDecodeError:
-                metadata = {}
-        else:
-            metadata = {}
+        metadata = self._read_metadata()
 
         records = metadata.setdefault("drivers", {})
-        records[platform_name] = {
-            "path": str(destination),
-            "browser_major": browser_major,
-            "download_url": source_url,
-            "archive_sha256": archive_sha256,
-            "updated_at": datetime.now(timezone.utc).isoformat(),
-        }
-
-        metadata_path.write_text(json.dumps(metadata, indent=2, ensure_ascii=False), encoding="utf-8")
+        previous = records.get(platform_name)
+        record = previous.copy() if isinstance(previous, dict) else {}
+        record.update(
+            {
+                "path": str(destination),
+                "browser_major": browser_major,
+                "browser_binary": browser_binary,
+                "browser_binary_mtime_ns": browser_mtime_ns,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        if source_url is not None:
+            record["download_url"] = source_url
+        if archive_sha256 is not None:
+            record["archive_sha256"] = archive_sha256
+        records[platform_name] = record
+
+        tmp_path = metadata_path.with_name(metadata_path.name + ".tmp")
+        tmp_path.write_bytes(_json_dumps_pretty(metadata))
+        tmp_path.replace(metadata_path)
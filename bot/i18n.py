@@ -2,17 +2,26 @@ from __future__ import annotations
 
 import json
 import logging
+import string
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 from config import get_runtime_settings
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logging.getLogger("tsp.i18n")
 _SETTINGS = get_runtime_settings()
 _LOCALES_DIR = Path(__file__).resolve().parent / "locales"
 _DEFAULT_LOCALE = (_SETTINGS.bot.default_locale or "en").lower()
 _SUPPORTED_LOCALES = tuple(locale.lower() for locale in _SETTINGS.bot.supported_locales)
-_TRANSLATIONS: dict[str, dict[str, str]] = {}
+_SUPPORTED_LOCALES_SET = frozenset(_SUPPORTED_LOCALES)
+_FORMATTER = string.Formatter()
 
 
 def supported_locales() -> tuple[str, ...]:
@@ -23,15 +32,17 @@ def default_locale() -> str:
     return _DEFAULT_LOCALE
 
 
+@lru_cache(maxsize=256)
 def normalize_locale(locale: str | None) -> str:
     if not locale:
         return _DEFAULT_LOCALE
     normalized = locale.strip().lower().replace("_", "-").split("-", maxsplit=1)[0]
-    if normalized in _SUPPORTED_LOCALES:
+    if normalized in _SUPPORTED_LOCALES_SET:
         return normalized
     return _DEFAULT_LOCALE
 
 
+@lru_cache(maxsize=None)
 def _load_locale(locale: str) -> dict[str, str]:
     path = _LOCALES_DIR / f"{locale}.json"
     if not path.exists():
@@ -39,8 +50,9 @@ def _load_locale(locale: str) -> dict[str, str]:
         return {}
 
     try:
-        payload = json.loads(path.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError) as exc:
+        raw = path.read_bytes()
+        payload = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except (ValueError, OSError) as exc:
         logger.warning("Failed to load locale file %s: %s", path, exc)
         return {}
 
@@ -51,22 +63,34 @@ def _load_locale(locale: str) -> dict[str, str]:
     return {str(key): str(value) for key, value in payload.items()}
 
 
+@lru_cache(maxsize=None)
 def _get_bundle(locale: str) -> dict[str, str]:
-    if locale not in _TRANSLATIONS:
-        _TRANSLATIONS[locale] = _load_locale(locale)
-    return _TRANSLATIONS[locale]
+    # Missing keys are pre-filled from the default locale and "en", so a
+    # translate() call is a single dict lookup.
+    return {**_load_locale("en"), **_load_locale(_DEFAULT_LOCALE), **_load_locale(locale)}
+
+
+@lru_cache(maxsize=None)
+def _get_static_bundle(locale: str) -> dict[str, str]:
+    # Templates without replacement fields render the same for any kwargs,
+    # so they are formatted once here and returned as-is afterwards.
+    static: dict[str, str] = {}
+    for key, template in _get_bundle(locale).items():
+        try:
+            if all(field is None for _, field, _, _ in _FORMATTER.parse(template)):
+                static[key] = template.format()
+        except ValueError:
+            continue
+    return static
 
 
 def translate(locale: str | None, key: str, **kwargs: object) -> str:
     resolved = normalize_locale(locale)
-    fallback_chain = (resolved, _DEFAULT_LOCALE, "en")
-
-    template: str | None = None
-    for candidate in fallback_chain:
-        template = _get_bundle(candidate).get(key)
-        if template is not None:
-            break
+    rendered = _get_static_bundle(resolved).get(key)
+    if rendered is not None:
+        return rendered
 
+    template = _get_bundle(resolved).get(key)
     if template is None:
         return key
 
@@ -75,3 +99,12 @@ def translate(locale: str | None, key: str, **kwargs: object) -> str:
     except Exception as exc:
         logger.warning("Failed to format i18n key '%s' for locale '%s': %s", key, resolved, exc)
         return template
+
+
+def _preload_bundles() -> None:
+    # Build every supported bundle up front so no user pays the first-load cost.
+    with ThreadPoolExecutor(max_workers=min(8, len(_SUPPORTED_LOCALES) or 1)) as executor:
+        list(executor.map(_get_static_bundle, _SUPPORTED_LOCALES))
+
+
+_preload_bundles()
@@ -1,48 +1,55 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
+import base64
 import html
 import io
+import itertools
 import logging
 import os
 import platform
 import re
 import shutil
+import string
 import tempfile
 import time
-import uuid
 from datetime import datetime
-from functools import partial
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import Any, Callable, Coroutine
 
 from aiogram import F, Router, types
 from aiogram.filters import Command
 from aiogram.types import BufferedInputFile, InlineKeyboardButton, InlineKeyboardMarkup
+import numpy as np
 from PIL import Image
 from selenium import webdriver
 from selenium.common.exceptions import SessionNotCreatedException, TimeoutException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 
 from bot.driver_manager import BrowserNotFoundError, DriverManager, DriverResolution
 from bot.i18n import default_locale, normalize_locale, supported_locales, translate
 from config import get_runtime_settings
 from database.database import (
-    db_change,
+    EventRecord,
     db_compact_events,
     db_find_user,
     db_get_locale,
-    db_get_value,
+    db_build_event,
     db_log_event,
+    db_log_events,
+    db_on_delete,
+    db_on_locale_change,
     db_recent_events,
     db_recent_users,
     db_register,
     db_set_locale,
     db_size_warning_mb,
     db_stats,
+    db_touch_user,
 )
 
 settings = get_runtime_settings()
@@ -55,23 +62,57 @@ driver_logger = logging.getLogger("tsp.driver")
 
 router_main = Router()
 _driver_manager = DriverManager(settings.driver)
-_driver: webdriver.Chrome | None = None
 _driver_resolution: DriverResolution | None = None
 _driver_error_hint: str | None = None
 _driver_boot_lock = asyncio.Lock()
-_driver_lock = asyncio.Lock()
-_process_pool = None
-_temp_profile_dirs: list[str] = []
+_temp_profile_dirs: set[str] = set()
+_idle_profile_dirs: list[str] = []
+_CHROME_DISK_CACHE_BYTES = 50 * 1024 * 1024
 _CHROMEDRIVER_LOG_PATH = Path("chromedriver.log")
 _CHROMEDRIVER_LOG_MAX_BYTES = max(int(os.getenv("CHROMEDRIVER_LOG_MAX_BYTES", "10485760")), 1)
 _CHROMEDRIVER_LOG_KEEP_LINES = max(int(os.getenv("CHROMEDRIVER_LOG_KEEP_LINES", "5000")), 1)
+_CHROMEDRIVER_LOG_TAIL_BYTES = min(_CHROMEDRIVER_LOG_MAX_BYTES, 2 * 1024 * 1024)
+_CHROMEDRIVER_LOG_TRIM_INTERVAL_SECONDS = 60.0
+_last_log_trim_ts = float("-inf")
 _USER_RATE_LIMIT_SECONDS = max(float(os.getenv("USER_RATE_LIMIT_SECONDS", "5")), 0.0)
-_CAPTURE_QUEUE_LIMIT = max(int(os.getenv("CAPTURE_QUEUE_LIMIT", "5")), 1)
+_USER_RATE_LIMIT_BURST = max(int(os.getenv("USER_RATE_LIMIT_BURST", "1")), 1)
+_USER_RATE_LIMIT_BURST_TOLERANCE = _USER_RATE_LIMIT_SECONDS * (_USER_RATE_LIMIT_BURST - 1)
 _CAPTURE_QUEUE_WAIT_SECONDS = max(float(os.getenv("CAPTURE_QUEUE_WAIT_SECONDS", "2")), 0.1)
-_capture_queue_slots = asyncio.BoundedSemaphore(_CAPTURE_QUEUE_LIMIT)
-_rate_limit_lock = asyncio.Lock()
-_last_user_request_ts: dict[int, float] = {}
-_first_image_notice_lock = asyncio.Lock()
+_BROWSER_POOL_SIZE = max(int(os.getenv("BROWSER_POOL_SIZE", "2")), 1)
+# Fewer capture slots than browsers would leave pooled browsers idle.
+_CAPTURE_QUEUE_LIMIT = max(int(os.getenv("CAPTURE_QUEUE_LIMIT", "5")), _BROWSER_POOL_SIZE)
+_BROWSER_POOL_RECYCLE_AFTER = max(int(os.getenv("BROWSER_POOL_RECYCLE_AFTER", "100")), 1)
+_capture_inflight = 0
+_capture_slot_freed = asyncio.Event()
+# Each slot holds a live driver or None (empty, filled lazily on checkout).
+_driver_pool: asyncio.Queue[webdriver.Chrome | None] = asyncio.Queue()
+for _ in range(_BROWSER_POOL_SIZE):
+    _driver_pool.put_nowait(None)
+_RATE_LIMIT_MAX_TRACKED_USERS = 10_000
+_TME_POST_RE = re.compile(r"https?://t\.me/([^/?#]+)/([\d/]+)")
+_MAX_LINK_TEXT_LENGTH = 512
+# zlib level 3 encodes a text-heavy 1200px screenshot in about half the time
+# of the default 6, for a file roughly a fifth larger.
+_PNG_COMPRESS_LEVEL = 3
+_CHROMA_KEY_COLOR = "#39ff00"
+_POST_WAIT_SECONDS = 20
+_VALID_TG_RE = re.compile(r"^(https://)?(t\.me|telegram\.me)/[\w\d_]+(/\d+)+$")
+_SLUG_KEEP = frozenset(string.ascii_letters + string.digits)
+_SLUG_TABLE = str.maketrans({chr(i): "_" for i in range(128) if chr(i) not in _SLUG_KEEP})
+_user_rate_tat: dict[int, float] = {}
+_EVENT_QUEUE_LIMIT = 10_000
+_EVENT_BATCH_SIZE = max(int(os.getenv("EVENT_BATCH_SIZE", "64")), 1)
+_EVENT_FLUSH_SECONDS = max(float(os.getenv("EVENT_FLUSH_SECONDS", "0.2")), 0.0)
+_event_queue: asyncio.Queue[EventRecord] = asyncio.Queue(maxsize=_EVENT_QUEUE_LIMIT)
+_event_writer_task: asyncio.Task[None] | None = None
+_background_tasks: set[asyncio.Task[object]] = set()
+# Correlation ids only need to be unique within one process's logs.
+_capture_ids = itertools.count(1)
+_REGISTER_REFRESH_SECONDS = 60.0
+_REGISTERED_USERS_MAX = 100_000
+_registered_users: dict[int, tuple[str | None, str | None, float]] = {}
+_LOCALE_CACHE_MAX_USERS = 4096
+_locale_cache: dict[int, str] = {}
 _is_first_image_after_start = True
 
 
@@ -79,13 +120,57 @@ def _resolve_locale(user: types.User | None) -> str:
     if not user:
         return default_locale()
 
+    cached_locale = _locale_cache.get(user.id)
+    if cached_locale is not None:
+        return cached_locale
+
     stored_locale = db_get_locale(user.id)
     if stored_locale:
-        return normalize_locale(stored_locale)
+        locale = normalize_locale(stored_locale)
+    else:
+        locale = normalize_locale(user.language_code)
+        db_set_locale(user.id, locale)
+    _remember_locale(user.id, locale)
+    return locale
+
+
+def _needs_register(user_id: int, username: str | None, fullname: str | None) -> bool:
+    # Skip the rewrite for a repeat user whose name is unchanged; last_seen is
+    # still refreshed at least once per _REGISTER_REFRESH_SECONDS.
+    now = time.monotonic()
+    seen = _registered_users.get(user_id)
+    return not (
+        seen is not None and seen[:2] == (username, fullname) and now - seen[2] < _REGISTER_REFRESH_SECONDS
+    )
+
+
+def _mark_registered(user_id: int, username: str | None, fullname: str | None) -> None:
+    # Only after db_register succeeded, so a failed write is retried next time.
+    if len(_registered_users) >= _REGISTERED_USERS_MAX and user_id not in _registered_users:
+        _registered_users.clear()
+    _registered_users[user_id] = (username, fullname, time.monotonic())
+
+
+def _forget_registered_user(user_id: int) -> None:
+    _registered_users.pop(user_id, None)
+
+
+db_on_delete(_forget_registered_user)
+
+
+def _remember_locale(user_id: int, locale: str) -> None:
+    # Plain dict: reads are lock-free and the whole map is dropped when full.
+    if len(_locale_cache) >= _LOCALE_CACHE_MAX_USERS and user_id not in _locale_cache:
+        _locale_cache.clear()
+    _locale_cache[user_id] = locale
+
 
-    auto_locale = normalize_locale(user.language_code)
-    db_set_locale(user.id, auto_locale)
-    return auto_locale
+def _forget_locale(user_id: int) -> None:
+    _locale_cache.pop(user_id, None)
+
+
+db_on_delete(_forget_locale)
+db_on_locale_change(_forget_locale)
 
 
 def _t(locale: str, key: str, **kwargs: object) -> str:
@@ -96,57 +181,185 @@ def _safe_html(value: object) -> str:
     return html.escape(str(value), quote=False)
 
 
-async def _rate_limit_retry_after(user_id: int) -> float:
+def _rate_limit_retry_after(user_id: int) -> float:
     if _USER_RATE_LIMIT_SECONDS <= 0:
         return 0.0
 
+    # GCRA: keep one theoretical arrival time per user. Synchronous on
+    # purpose: the event loop cannot switch tasks between read and write.
     now = time.monotonic()
-    async with _rate_limit_lock:
-        last_seen = _last_user_request_ts.get(user_id)
-        if last_seen is not None:
-            retry_after = _USER_RATE_LIMIT_SECONDS - (now - last_seen)
-            if retry_after > 0:
-                return retry_after
-        _last_user_request_ts[user_id] = now
-        return 0.0
+    tat = max(_user_rate_tat.get(user_id, now), now)
+    retry_after = tat - now - _USER_RATE_LIMIT_BURST_TOLERANCE
+    if retry_after > 0:
+        return retry_after
+    _user_rate_tat[user_id] = tat + _USER_RATE_LIMIT_SECONDS
+
+    if len(_user_rate_tat) > _RATE_LIMIT_MAX_TRACKED_USERS:
+        # Drop only users whose bucket has fully drained; clearing everything
+        # would let active users bypass the limit.
+        for stale_user_id in [uid for uid, user_tat in _user_rate_tat.items() if user_tat <= now]:
+            del _user_rate_tat[stale_user_id]
+    return 0.0
 
 
 async def _acquire_capture_slot() -> bool:
+    global _capture_inflight
+    # Fast path is a plain counter check; only a full queue waits on the event.
+    deadline = time.monotonic() + _CAPTURE_QUEUE_WAIT_SECONDS
+    while _capture_inflight >= _CAPTURE_QUEUE_LIMIT:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        _capture_slot_freed.clear()
+        try:
+            await asyncio.wait_for(_capture_slot_freed.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            return False
+    _capture_inflight += 1
+    return True
+
+
+def _release_capture_slot() -> None:
+    global _capture_inflight
+    _capture_inflight -= 1
+    _capture_slot_freed.set()
+
+
+def _spawn_background(coro: Coroutine[Any, Any, object]) -> None:
+    # For final status edits nobody waits on; keep a reference until done.
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_background_task_done)
+
+
+def _on_background_task_done(task: asyncio.Task[object]) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background task failed: %s", task.exception())
+
+
+def _log_event(**fields: object) -> None:
+    # Handlers only enqueue; _event_writer persists events in batches.
+    if _event_writer_task is None:
+        db_log_event(**fields)
+        return
     try:
-        await asyncio.wait_for(_capture_queue_slots.acquire(), timeout=_CAPTURE_QUEUE_WAIT_SECONDS)
-        return True
-    except asyncio.TimeoutError:
-        return False
+        _event_queue.put_nowait(db_build_event(**fields))
+    except asyncio.QueueFull:
+        logger.warning("Event queue is full, dropping event: %s", fields.get("action"))
+
+
+async def _event_writer() -> None:
+    running = True
+    while running:
+        batch = [await _event_queue.get()]
+        try:
+            await asyncio.sleep(_EVENT_FLUSH_SECONDS)
+        except asyncio.CancelledError:
+            # Still write what was already taken off the queue.
+            running = False
+        while len(batch) < _EVENT_BATCH_SIZE and not _event_queue.empty():
+            batch.append(_event_queue.get_nowait())
+        try:
+            await asyncio.to_thread(db_log_events, batch)
+        except Exception as exc:
+            logger.warning("Failed to write %s events: %s", len(batch), exc)
+
+
+def start_event_writer() -> None:
+    global _event_writer_task
+    if _event_writer_task is None:
+        _event_writer_task = asyncio.create_task(_event_writer())
+
+
+async def stop_event_writer() -> None:
+    global _event_writer_task
+    task, _event_writer_task = _event_writer_task, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    pending: list[EventRecord] = []
+    while not _event_queue.empty():
+        pending.append(_event_queue.get_nowait())
+    if pending:
+        await asyncio.to_thread(db_log_events, pending)
 
 
-async def _consume_first_image_flag() -> bool:
+def _consume_first_image_flag() -> bool:
+    # No await between check and set, so this is atomic on the event loop.
     global _is_first_image_after_start
-    async with _first_image_notice_lock:
-        if _is_first_image_after_start:
-            _is_first_image_after_start = False
-            return True
-        return False
+    if _is_first_image_after_start:
+        _is_first_image_after_start = False
+        return True
+    return False
 
 
 def _mark_driver(driver: webdriver.Chrome, profile_dir: str | None) -> None:
     if profile_dir:
         setattr(driver, "_tsp_profile_dir", profile_dir)
-        _temp_profile_dirs.append(profile_dir)
+        _temp_profile_dirs.add(profile_dir)
 
 
-def _cleanup_profile_from_driver(driver: webdriver.Chrome | None) -> None:
+def _cleanup_profile_from_driver(driver: webdriver.Chrome | None, *, reusable: bool = True) -> None:
+    # Called after quit(): keep the profile on disk so the next driver starts
+    # from a warm profile; directories are removed at process exit.
     if not driver:
         return
     profile_dir = getattr(driver, "_tsp_profile_dir", None)
-    if profile_dir:
-        try:
-            shutil.rmtree(profile_dir, ignore_errors=True)
-        except Exception:
-            pass
-        try:
-            _temp_profile_dirs.remove(profile_dir)
-        except ValueError:
-            pass
+    if not profile_dir:
+        return
+    if reusable:
+        _idle_profile_dirs.append(profile_dir)
+        return
+    # quit() failed, so Chrome may still hold the profile's SingletonLock;
+    # never hand it out again. It stays tracked for the atexit sweep in case
+    # a live process keeps files open.
+    shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def _take_profile_dir() -> str:
+    try:
+        return _idle_profile_dirs.pop()
+    except IndexError:
+        return tempfile.mkdtemp(prefix="tsp-chrome-profile-")
+
+
+def _remove_profile_dirs() -> None:
+    for profile_dir in list(_temp_profile_dirs):
+        shutil.rmtree(profile_dir, ignore_errors=True)
+    _temp_profile_dirs.clear()
+    _idle_profile_dirs.clear()
+
+
+atexit.register(_remove_profile_dirs)
+
+
+_BLOCKED_URL_PATTERNS = (
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*mc.yandex.ru*",
+)
+
+# Browser services that never affect a post screenshot.
+_CHROME_LEAN_ARGS = (
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-client-side-phishing-detection",
+    "--disable-hang-monitor",
+    "--disable-prompt-on-repost",
+    "--disable-features=Translate,BackForwardCache,MediaRouter,OptimizationHints,DialMediaRouteProvider,AcceptCHFrame",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+)
 
 
 def _build_chrome_options(resolution: DriverResolution) -> tuple[Options, str | None]:
@@ -159,6 +372,8 @@ def _build_chrome_options(resolution: DriverResolution) -> tuple[Options, str |
     chrome_options.add_argument("--disable-infobars")
     chrome_options.add_argument("--disable-browser-side-navigation")
     chrome_options.add_argument("--window-size=1200,1200")
+    for arg in _CHROME_LEAN_ARGS:
+        chrome_options.add_argument(arg)
     chrome_options.add_argument(
         "--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
         "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -174,24 +389,39 @@ def _build_chrome_options(resolution: DriverResolution) -> tuple[Options, str |
 
     # Linux headless is usually more stable with an isolated profile.
     if is_linux:
-        temp_profile_dir = tempfile.mkdtemp(prefix="tsp-chrome-profile-")
+        temp_profile_dir = _take_profile_dir()
         chrome_options.add_argument(f"--user-data-dir={temp_profile_dir}")
         chrome_options.add_argument(f"--data-path={temp_profile_dir}")
+        # Profiles are reused across drivers now, so bound the HTTP cache.
+        chrome_options.add_argument(f"--disk-cache-size={_CHROME_DISK_CACHE_BYTES}")
         chrome_options.add_argument("--remote-debugging-port=0")
 
     return chrome_options, temp_profile_dir
 
 
 def _trim_chromedriver_log_if_needed() -> None:
+    global _last_log_trim_ts
+    now = time.monotonic()
+    if now - _last_log_trim_ts < _CHROMEDRIVER_LOG_TRIM_INTERVAL_SECONDS:
+        return
+    _last_log_trim_ts = now
+
     try:
-        if not _CHROMEDRIVER_LOG_PATH.exists():
+        try:
+            size = _CHROMEDRIVER_LOG_PATH.stat().st_size
+        except FileNotFoundError:
             return
-        if _CHROMEDRIVER_LOG_PATH.stat().st_size <= _CHROMEDRIVER_LOG_MAX_BYTES:
+        if size <= _CHROMEDRIVER_LOG_MAX_BYTES:
             return
 
-        with _CHROMEDRIVER_LOG_PATH.open("r+", encoding="utf-8", errors="replace") as fh:
-            lines = fh.readlines()
-            if len(lines) <= _CHROMEDRIVER_LOG_KEEP_LINES:
+        # Read back only the tail window instead of the whole file.
+        with _CHROMEDRIVER_LOG_PATH.open("r+b") as fh:
+            start = max(size - _CHROMEDRIVER_LOG_TAIL_BYTES, 0)
+            fh.seek(start)
+            lines = fh.read().splitlines(keepends=True)
+            if start > 0 and lines:
+                lines = lines[1:]
+            if start == 0 and len(lines) <= _CHROMEDRIVER_LOG_KEEP_LINES:
                 return
             tail = lines[-_CHROMEDRIVER_LOG_KEEP_LINES :]
             fh.seek(0)
@@ -205,39 +435,58 @@ def _create_driver_sync(resolution: DriverResolution) -> webdriver.Chrome:
     _trim_chromedriver_log_if_needed()
     chrome_options, temp_profile_dir = _build_chrome_options(resolution)
 
-    if resolution.driver_path:
-        service = Service(
-            executable_path=str(resolution.driver_path),
-            service_args=["--verbose", "--log-path=chromedriver.log"],
-        )
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        _mark_driver(driver, temp_profile_dir)
-        return driver
+    try:
+        if resolution.driver_path:
+            service = Service(
+                executable_path=str(resolution.driver_path),
+                service_args=["--verbose", "--log-path=chromedriver.log"],
+            )
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+        else:
+            driver = webdriver.Chrome(options=chrome_options)
+    except Exception:
+        if temp_profile_dir:
+            _temp_profile_dirs.add(temp_profile_dir)
+            _idle_profile_dirs.append(temp_profile_dir)
+        raise
 
-    driver = webdriver.Chrome(options=chrome_options)
+    # In-page waits carry their own deadlines; leave WebDriver some headroom.
+    driver.set_script_timeout(_POST_WAIT_SECONDS + 5)
     _mark_driver(driver, temp_profile_dir)
+    _block_tracker_requests(driver)
     return driver
 
 
-def _build_candidate_urls(url: str) -> list[str]:
+def _block_tracker_requests(driver: webdriver.Chrome) -> None:
+    # Analytics never shows up in a screenshot; fonts do, so they still load.
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(_BLOCKED_URL_PATTERNS)})
+    except Exception as exc:
+        logger.warning("Failed to set blocked URLs: %s", exc)
+
+
+@lru_cache(maxsize=512)
+def _build_candidate_urls(url: str) -> tuple[str, ...]:
     urls: list[str] = []
     normalized = url.strip()
     if not normalized.startswith("http"):
         normalized = "https://" + normalized
     urls.append(normalized)
 
-    match = re.match(r"https?://t\.me/([^/?#]+)/([\d/]+)", normalized)
+    match = _TME_POST_RE.match(normalized)
     if match:
         slug, ids = match.group(1), match.group(2)
         post_id = ids.split("/")[0]
         urls.append(f"https://t.me/s/{slug}/{post_id}")
 
+    sep = "&" if "?" in normalized else "?"
     if "embed=1" not in normalized:
-        urls.append(normalized + ("&embed=1" if "?" in normalized else "?embed=1"))
-        urls.append(normalized + ("&embed=1&mode=tme" if "?" in normalized else "?embed=1&mode=tme"))
+        urls.append(f"{normalized}{sep}embed=1")
+        urls.append(f"{normalized}{sep}embed=1&mode=tme")
 
     if "?single" not in normalized and "&single" not in normalized:
-        urls.append(normalized + ("&single" if "?" in normalized else "?single"))
+        urls.append(f"{normalized}{sep}single")
 
     unique: list[str] = []
     seen: set[str] = set()
@@ -245,29 +494,47 @@ def _build_candidate_urls(url: str) -> list[str]:
         if item not in seen:
             seen.add(item)
             unique.append(item)
-    return unique
+    return tuple(unique)
 
 
-def _selenium_capture(driver: webdriver.Chrome, url: str) -> bytes:
+def _selenium_capture(driver: webdriver.Chrome, url: str) -> tuple[bytes, bool]:
     candidates = _build_candidate_urls(url)
     last_exc: Exception | None = None
     post_element = None
     active_frame = None
 
     def _wait_and_pick() -> object | None:
-        WebDriverWait(driver, 20).until(
-            EC.any_of(
-                EC.presence_of_element_located((By.CLASS_NAME, "tgme_widget_message")),
-                EC.presence_of_element_located((By.CLASS_NAME, "tgme_widget_message_wrap")),
-                EC.presence_of_element_located((By.CLASS_NAME, "tgme_page_widget")),
+        # Wait inside the page instead of polling over WebDriver every 500 ms;
+        # works in the current frame, unlike a CDP Runtime.evaluate.
+        try:
+            element = driver.execute_async_script(
+                """
+                const deadline = performance.now() + arguments[0];
+                const done = arguments[arguments.length - 1];
+                const selectors = ['.tgme_widget_message', '.tgme_widget_message_wrap', '.tgme_page_widget'];
+                (function tick(){
+                  for (const selector of selectors) {
+                    const el = document.querySelector(selector);
+                    if (el) {
+                      done(el);
+                      return;
+                    }
+                  }
+                  if (performance.now() > deadline) {
+                    done(null);
+                  } else {
+                    setTimeout(tick, 50);
+                  }
+                })();
+                """,
+                _POST_WAIT_SECONDS * 1000,
             )
-        )
-        for cls in ("tgme_widget_message", "tgme_widget_message_wrap", "tgme_page_widget"):
-            try:
-                return driver.find_element(By.CLASS_NAME, cls)
-            except Exception:
-                continue
-        return None
+        except WebDriverException as exc:
+            # Script timeouts or a navigation mid-wait count as "not found here".
+            raise TimeoutException(str(exc)) from exc
+        if element is None:
+            raise TimeoutException("Post element did not appear")
+        return element
 
     for attempt_url in candidates:
         try:
@@ -315,20 +582,24 @@ def _selenium_capture(driver: webdriver.Chrome, url: str) -> bytes:
         except Exception:
             pass
 
+    # Render on a transparent canvas when Chrome allows it. Inside a frame the
+    # embedding page would show through, so the green chroma key is kept there.
+    chroma_key = active_frame is not None or not _enable_transparent_background(driver)
+
     driver.execute_script(
         """
         const el = arguments[0];
-        (function clearBackgrounds(root){
-          const all = [root, ...root.querySelectorAll('*')];
-          for (const e of all){
-            e.style.background = 'transparent';
-            e.style.backgroundColor = 'transparent';
-            e.style.boxShadow = 'none';
-            e.style.filter = 'none';
-          }
-        })(el);
-        document.documentElement.style.background = '#39ff00';
-        document.body.style.background = '#39ff00';
+        const background = arguments[1];
+        const style = document.createElement('style');
+        style.textContent = '.tsp-clear, .tsp-clear * {'
+          + 'background: transparent !important;'
+          + 'background-color: transparent !important;'
+          + 'box-shadow: none !important;'
+          + 'filter: none !important;}';
+        (document.head || document.documentElement).appendChild(style);
+        el.classList.add('tsp-clear');
+        document.documentElement.style.background = background;
+        document.body.style.background = background;
         document.body.style.overflow = 'visible';
         document.documentElement.style.overflow = 'visible';
         document.querySelector('.tgme_background_wrap')?.remove();
@@ -337,23 +608,91 @@ def _selenium_capture(driver: webdriver.Chrome, url: str) -> bytes:
         return true;
         """,
         post_element,
+        _CHROMA_KEY_COLOR if chroma_key else "transparent",
     )
 
-    rect = None
-    for _ in range(20):
-        try:
-            rect = driver.execute_script(
-                "const r = arguments[0].getBoundingClientRect(); return {left:r.left, top:r.top, width:r.width, height:r.height};",
-                post_element,
-            )
-        except Exception:
-            rect = None
-        if rect and rect["width"] > 1 and rect["height"] > 1:
-            break
-        time.sleep(0.1)
+    # Poll the layout inside the page (up to 2 s) in a single round-trip.
+    try:
+        rect = driver.execute_async_script(
+            """
+            const el = arguments[0];
+            const done = arguments[arguments.length - 1];
+            const deadline = performance.now() + 2000;
+            (function tick(){
+              const r = el.getBoundingClientRect();
+              if ((r.width > 1 && r.height > 1) || performance.now() > deadline) {
+                done({left: r.left, top: r.top, width: r.width, height: r.height});
+              } else {
+                requestAnimationFrame(tick);
+              }
+            })();
+            """,
+            post_element,
+        )
+    except Exception:
+        rect = None
 
     try:
-        screenshot = post_element.screenshot_as_png
+        return _clip_screenshot_png(driver, post_element), chroma_key
+    except Exception as exc:
+        logger.warning("CDP clip screenshot failed (%s). Using element screenshot fallback.", exc)
+        return _element_screenshot_png(driver, post_element, rect), chroma_key
+
+
+def _enable_transparent_background(driver: webdriver.Chrome) -> bool:
+    try:
+        driver.execute_cdp_cmd(
+            "Emulation.setDefaultBackgroundColorOverride",
+            {"color": {"r": 0, "g": 0, "b": 0, "a": 0}},
+        )
+        return True
+    except Exception as exc:
+        logger.warning("Transparent background override failed (%s). Using chroma key.", exc)
+        return False
+
+
+def _clip_screenshot_png(driver: webdriver.Chrome, post_element: object) -> bytes:
+    # Page.captureScreenshot wants page coordinates in CSS pixels, so add the
+    # scroll offset and the offsets of any enclosing (same-origin) frames.
+    clip = driver.execute_script(
+        """
+        const r = arguments[0].getBoundingClientRect();
+        let x = r.left, y = r.top, w = window;
+        try {
+          while (w.frameElement) {
+            const f = w.frameElement.getBoundingClientRect();
+            x += f.left;
+            y += f.top;
+            w = w.parent;
+          }
+        } catch (e) {}
+        return {x: x + w.scrollX, y: y + w.scrollY, width: r.width, height: r.height};
+        """,
+        post_element,
+    )
+    if not clip or clip["width"] <= 1 or clip["height"] <= 1:
+        raise WebDriverException(f"Post element has an empty bounding box: {clip}")
+
+    result = driver.execute_cdp_cmd(
+        "Page.captureScreenshot",
+        {
+            "format": "png",
+            "captureBeyondViewport": True,
+            "clip": {
+                "x": clip["x"],
+                "y": clip["y"],
+                "width": clip["width"],
+                "height": clip["height"],
+                "scale": 1,
+            },
+        },
+    )
+    return base64.b64decode(result["data"])
+
+
+def _element_screenshot_png(driver: webdriver.Chrome, post_element: object, rect: dict | None) -> bytes:
+    try:
+        return post_element.screenshot_as_png
     except WebDriverException as exc:
         logger.warning("Element screenshot failed (%s). Using viewport crop fallback.", exc)
         if rect is None:
@@ -374,46 +713,59 @@ def _selenium_capture(driver: webdriver.Chrome, url: str) -> bytes:
         cropped = full_img.crop((left, top, right, bottom))
         buf = io.BytesIO()
         cropped.save(buf, format="PNG")
-        screenshot = buf.getvalue()
+        return buf.getvalue()
 
-    return screenshot
-
-
-def _remove_green_pixels_sync(png_bytes: bytes) -> Image.Image:
-    try:
-        import numpy as np
 
-        use_numpy = True
-    except Exception:
-        use_numpy = False
-
-    img = Image.open(io.BytesIO(png_bytes)).convert("RGBA")
+def _remove_green_pixels_sync(png_bytes: bytes, chroma_key: bool = True) -> bytes:
     max_dim = 1200
+    img = Image.open(io.BytesIO(png_bytes))
+    # Downscale before the RGBA conversion so the full-size raster is never
+    # expanded to four channels; draft() lets decoders that support it
+    # (JPEG) emit a reduced image directly.
+    img.draft("RGB", (max_dim, max_dim))
+    unchanged = img.format == "PNG"
     if max(img.size) > max_dim:
         img.thumbnail((max_dim, max_dim), Image.LANCZOS)
-
-    if use_numpy:
-        arr = np.array(img)
-        r = arr[..., 0].astype("int16")
-        g = arr[..., 1].astype("int16")
-        b = arr[..., 2].astype("int16")
-        mask = (r >= 30) & (r <= 90) & (g >= 220) & (b <= 50) & (g > r + 20) & (g > b + 20)
-        arr[mask, 3] = 0
-        return Image.fromarray(arr, mode="RGBA")
-
-    datas = img.getdata()
-    new_data = []
-    for r, g, b, a in datas:
-        if 30 <= r <= 90 and g >= 220 and b <= 50 and g > r + 20 and g > b + 20:
-            new_data.append((0, 0, 0, 0))
+        unchanged = False
+    if not chroma_key and unchanged:
+        # Chrome already rendered the background transparent; nothing to do.
+        return png_bytes
+    img = img.convert("RGBA")
+
+    if chroma_key:
+        # Read-only view: only the alpha plane is copied and written back.
+        arr = np.asarray(img)
+        green = arr[..., 1] >= 220
+        if not green.any():
+            # No marker background visible: nothing to make transparent.
+            if unchanged:
+                return png_bytes
         else:
-            new_data.append((r, g, b, a))
-    img.putdata(new_data)
-    return img
+            r = arr[..., 0]
+            b = arr[..., 2]
+            # g >= 220 with r <= 90 and b <= 50 already implies g > r + 20 and
+            # g > b + 20, so the mask stays in uint8 without widening copies.
+            green &= (r >= 30) & (r <= 90) & (b <= 50)
+            alpha = arr[..., 3].copy()
+            alpha[green] = 0
+            img.putalpha(Image.fromarray(alpha, mode="L"))
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=_PNG_COMPRESS_LEVEL, optimize=False)
+    return buf.getvalue()
+
+
+def _prewarm_image_pipeline_sync() -> None:
+    # PIL registers its codecs on first use; pay that before the first capture.
+    buf = io.BytesIO()
+    Image.new("RGB", (2, 2), _CHROMA_KEY_COLOR).save(buf, format="PNG")
+    _remove_green_pixels_sync(buf.getvalue())
 
 
 async def preflight_driver_startup() -> None:
     global _driver_resolution, _driver_error_hint
+    start_event_writer()
+    _spawn_background(asyncio.to_thread(_prewarm_image_pipeline_sync))
     try:
         _driver_resolution = await asyncio.to_thread(_driver_manager.preflight)
         _driver_error_hint = None
@@ -426,28 +778,21 @@ async def preflight_driver_startup() -> None:
     except BrowserNotFoundError as exc:
         _driver_error_hint = str(exc)
         driver_logger.warning("Chrome/Chromium not found: %s", exc)
+        return
     except Exception as exc:
         _driver_error_hint = f"Driver preflight failed: {exc}"
         driver_logger.exception("Driver preflight failed")
+        return
 
+    await _prewarm_driver_pool()
 
-async def _ensure_driver(*, force_refresh: bool = False) -> None:
-    global _driver, _driver_resolution, _process_pool, _driver_error_hint
-
-    if _process_pool is None:
-        from concurrent.futures import ProcessPoolExecutor
 
-        _process_pool = ProcessPoolExecutor(max_workers=1)
+async def _ensure_driver_resolution(*, force_refresh: bool = False) -> DriverResolution:
+    global _driver_resolution, _driver_error_hint
 
     async with _driver_boot_lock:
-        if force_refresh and _driver is not None:
-            stale_driver = _driver
-            _driver = None
-            await asyncio.to_thread(stale_driver.quit)
-            await asyncio.to_thread(_cleanup_profile_from_driver, stale_driver)
-
-        if _driver is not None:
-            return
+        if _driver_resolution is not None and not force_refresh:
+            return _driver_resolution
 
         try:
             _driver_resolution = await asyncio.to_thread(
@@ -457,8 +802,55 @@ async def _ensure_driver(*, force_refresh: bool = False) -> None:
         except BrowserNotFoundError as exc:
             _driver_error_hint = str(exc)
             raise
+        return _driver_resolution
+
+
+def _quit_driver_sync(driver: webdriver.Chrome) -> None:
+    try:
+        driver.quit()
+    except Exception as exc:
+        driver_logger.warning("Failed to quit driver: %s", exc)
+        _cleanup_profile_from_driver(driver, reusable=False)
+        return
+    _cleanup_profile_from_driver(driver)
+
+
+async def _checkout_driver() -> webdriver.Chrome:
+    driver = await _driver_pool.get()
+    if driver is not None:
+        return driver
+
+    try:
+        resolution = await _ensure_driver_resolution(force_refresh=False)
+        return await asyncio.to_thread(_create_driver_sync, resolution)
+    except BaseException:
+        _driver_pool.put_nowait(None)
+        raise
+
+
+async def _release_driver(driver: webdriver.Chrome, *, discard: bool = False) -> None:
+    use_count = getattr(driver, "_tsp_use_count", 0) + 1
+    setattr(driver, "_tsp_use_count", use_count)
+    if not discard and use_count < _BROWSER_POOL_RECYCLE_AFTER:
+        _driver_pool.put_nowait(driver)
+        return
+
+    # Free the slot before quitting so waiters are not held up by teardown.
+    _driver_pool.put_nowait(None)
+    await asyncio.to_thread(_quit_driver_sync, driver)
+
+
+async def _prewarm_driver_pool() -> None:
+    async def _warm_slot() -> None:
+        try:
+            driver = await _checkout_driver()
+        except Exception as exc:
+            driver_logger.warning("Driver prewarm failed: %s", exc)
+            return
+        _driver_pool.put_nowait(driver)
 
-        _driver = await asyncio.to_thread(_create_driver_sync, _driver_resolution)
+    await asyncio.gather(*(_warm_slot() for _ in range(_BROWSER_POOL_SIZE)))
+    driver_logger.info("Driver pool prewarmed. size=%s", _BROWSER_POOL_SIZE)
 
 
 async def capture_telegram_post(
@@ -467,12 +859,11 @@ async def capture_telegram_post(
     cid: str,
     locale: str,
 ) -> tuple[str, bytes] | None:
-    global _driver
     logger.info("[cid=%s] Starting post processing: %s", cid, url)
     await progress_message.edit_text(_t(locale, "capture.start"))
 
     try:
-        await _ensure_driver(force_refresh=False)
+        driver: webdriver.Chrome | None = await _checkout_driver()
     except BrowserNotFoundError:
         hint = _driver_error_hint or _driver_manager.browser_install_hint()
         await progress_message.edit_text(_t(locale, "capture.browser_missing", hint=hint))
@@ -483,63 +874,75 @@ async def capture_telegram_post(
         return None
 
     await progress_message.edit_text(_t(locale, "capture.loading"))
-    async with _driver_lock:
+    discard_driver = False
+    try:
         try:
-            _trim_chromedriver_log_if_needed()
-            post_screenshot = await asyncio.to_thread(_selenium_capture, _driver, url)
+            post_screenshot, chroma_key = await asyncio.to_thread(_selenium_capture, driver, url)
         except SessionNotCreatedException:
             logger.warning("[cid=%s] SessionNotCreated, recreating driver", cid)
+            stale_driver, driver = driver, None
             try:
-                await _ensure_driver(force_refresh=True)
-                post_screenshot = await asyncio.to_thread(_selenium_capture, _driver, url)
+                # Tear down the stale browser while the driver is re-resolved;
+                # the install swaps the binary atomically, so they can overlap.
+                await asyncio.gather(
+                    _release_driver(stale_driver, discard=True),
+                    _ensure_driver_resolution(force_refresh=True),
+                )
+                driver = await _checkout_driver()
+                post_screenshot, chroma_key = await asyncio.to_thread(_selenium_capture, driver, url)
             except Exception as exc:
                 logger.exception("[cid=%s] Retry after driver refresh failed: %s", cid, exc)
+                discard_driver = True
                 await progress_message.edit_text(
                     _t(locale, "capture.driver_update_failed", error=str(exc)[:200])
                 )
                 return None
         except Exception as exc:
             logger.exception("[cid=%s] Page capture failed: %s", cid, exc)
-            stale_driver = _driver
-            _driver = None
-            if stale_driver is not None:
-                try:
-                    await asyncio.to_thread(stale_driver.quit)
-                    await asyncio.to_thread(_cleanup_profile_from_driver, stale_driver)
-                except Exception:
-                    pass
+            discard_driver = True
             await progress_message.edit_text(_t(locale, "capture.load_error", error=str(exc)[:200]))
             return None
+    finally:
+        if driver is not None:
+            await _release_driver(driver, discard=discard_driver)
 
     await progress_message.edit_text(_t(locale, "capture.screenshot"))
-    loop = asyncio.get_running_loop()
     try:
-        img = await loop.run_in_executor(_process_pool, _remove_green_pixels_sync, post_screenshot)
+        png_bytes = await asyncio.to_thread(_remove_green_pixels_sync, post_screenshot, chroma_key)
     except Exception as exc:
         logger.exception("[cid=%s] Image processing failed: %s", cid, exc)
         await progress_message.edit_text(_t(locale, "capture.image_processing_error", error=str(exc)[:200]))
         return None
 
-    cleaned_url = re.sub(r"[^a-zA-Z0-9]", "_", url.split("t.me/")[-1].split("?embed=1")[0]) or "post"
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
-
+    raw_name = url.split("t.me/")[-1].split("?embed=1")[0]
+    # Non-ASCII characters become "?" first, which the table maps to "_".
+    cleaned_url = raw_name.encode("ascii", "replace").decode("ascii").translate(_SLUG_TABLE) or "post"
     await progress_message.edit_text(_t(locale, "capture.ready"))
-    return cleaned_url + ".png", buf.read()
+    return cleaned_url + ".png", png_bytes
 
 
 def validate_tg_link(text: str) -> str | None:
-    match = re.match(r"^(https://)?(t\.me|telegram\.me)/[\w\d_]+(/\d+)+$", text.strip())
+    # Anything this long is not a bare post link; keeps big texts out of the cache.
+    if len(text) > _MAX_LINK_TEXT_LENGTH:
+        return None
+    return _validate_tg_link_cached(text)
+
+
+@lru_cache(maxsize=4096)
+def _validate_tg_link_cached(text: str) -> str | None:
+    candidate = text.strip()
+    match = _VALID_TG_RE.match(candidate)
     if not match:
         return None
-    return f"https://{text.strip()}" if not text.startswith("https://") else text.strip()
+    return candidate if match.group(1) else f"https://{candidate}"
 
 
 def _is_admin(user_id: int) -> bool:
     return user_id in settings.bot.admin_ids
 
 
+# Keyboards depend only on the locale, so one markup per locale is reused.
+@lru_cache(maxsize=16)
 def _admin_menu(locale: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -554,6 +957,21 @@ def _admin_menu(locale: str) -> InlineKeyboardMarkup:
     )
 
 
+@lru_cache(maxsize=16)
+def _language_menu(locale: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text=_t(locale, f"lang.option.{lang}"), callback_data=f"lang:set:{lang}")]
+            for lang in supported_locales()
+        ]
+    )
+
+
+@lru_cache(maxsize=16)
+def _users_back_row(locale: str) -> list[InlineKeyboardButton]:
+    return [InlineKeyboardButton(text=_t(locale, "admin.users.back"), callback_data="admin:refresh")]
+
+
 def _format_live_summary(locale: str) -> str:
     stats = db_stats()
     warning_size_mb = db_size_warning_mb()
@@ -597,7 +1015,7 @@ def _format_users_page(locale: str) -> tuple[str, InlineKeyboardMarkup]:
                 [InlineKeyboardButton(text=_t(locale, "admin.users.open", key=key), callback_data=f"admin:user:{key}")]
             )
 
-    keyboard_rows.append([InlineKeyboardButton(text=_t(locale, "admin.users.back"), callback_data="admin:refresh")])
+    keyboard_rows.append(_users_back_row(locale))
     return "\n".join(lines), InlineKeyboardMarkup(inline_keyboard=keyboard_rows)
 
 
@@ -633,19 +1051,20 @@ async def start(message: types.Message) -> None:
         user_id = message.from_user.id
         username = message.from_user.username
         fullname = message.from_user.first_name
-        db_register(user_id, username, fullname)
-
         current_time = datetime.now().strftime("%H:%M %d.%m.%Y")
-        first_login = db_get_value(user_id, "first_login")
-        if first_login == "*":
-            db_change(user_id, "first_login", current_time)
-
-        db_log_event(
-            user_id=user_id,
-            username=username,
-            action="user_started_bot",
-            status="ok",
-            meta={},
+        await asyncio.to_thread(
+            db_touch_user,
+            user_id,
+            username,
+            fullname,
+            current_time,
+            event=db_build_event(
+                user_id=user_id,
+                username=username,
+                action="user_started_bot",
+                status="ok",
+                meta={},
+            ),
         )
 
     await message.answer(
@@ -658,14 +1077,10 @@ async def start(message: types.Message) -> None:
 @router_main.message(Command("lang"))
 async def language_menu(message: types.Message) -> None:
     locale = _resolve_locale(message.from_user)
-    rows = [
-        [InlineKeyboardButton(text=_t(locale, f"lang.option.{lang}"), callback_data=f"lang:set:{lang}")]
-        for lang in supported_locales()
-    ]
     await message.answer(
         _t(locale, "lang.command.prompt"),
         parse_mode="HTML",
-        reply_markup=InlineKeyboardMarkup(inline_keyboard=rows),
+        reply_markup=_language_menu(locale),
     )
 
 
@@ -676,7 +1091,7 @@ async def admin_panel(message: types.Message) -> None:
         await message.answer(_t(locale, "common.access_denied"))
         return
 
-    db_log_event(
+    _log_event(
         user_id=message.from_user.id,
         username=message.from_user.username,
         action="admin_opened_panel",
@@ -743,6 +1158,7 @@ async def language_callbacks(callback: types.CallbackQuery) -> None:
         return
 
     db_set_locale(callback.from_user.id, selected_locale)
+    _remember_locale(callback.from_user.id, selected_locale)
     if callback.message is not None:
         await callback.message.edit_text(
             _t(
@@ -755,6 +1171,66 @@ async def language_callbacks(callback: types.CallbackQuery) -> None:
     await callback.answer()
 
 
+_AdminRendered = tuple[str, InlineKeyboardMarkup] | None
+
+
+def _render_admin_live(locale: str, action: list[str]) -> _AdminRendered:
+    return _format_live_summary(locale), _admin_menu(locale)
+
+
+def _render_admin_users(locale: str, action: list[str]) -> _AdminRendered:
+    return _format_users_page(locale)
+
+
+def _render_admin_events(locale: str, action: list[str]) -> _AdminRendered:
+    return _format_events_page(locale), _admin_menu(locale)
+
+
+def _render_admin_errors(locale: str, action: list[str]) -> _AdminRendered:
+    return _format_events_page(locale, status="error"), _admin_menu(locale)
+
+
+def _render_admin_find_help(locale: str, action: list[str]) -> _AdminRendered:
+    return _t(locale, "admin.find.help"), _admin_menu(locale)
+
+
+def _render_admin_compact(locale: str, action: list[str]) -> _AdminRendered:
+    removed = db_compact_events(keep_last=2000)
+    return _t(locale, "admin.compact.done", removed=removed), _admin_menu(locale)
+
+
+def _render_admin_user(locale: str, action: list[str]) -> _AdminRendered:
+    if len(action) != 3:
+        return None
+    found = db_find_user(action[2])
+    if not found:
+        return _t(locale, "admin.find.not_found"), _admin_menu(locale)
+    key, user = found
+    text = _t(
+        locale,
+        "admin.user.card",
+        key=_safe_html(key),
+        username=_safe_html(user.get("username", "None")),
+        fullname=_safe_html(user.get("fullname", "*")),
+        role=_safe_html(user.get("role", "member")),
+        first_login=_safe_html(user.get("first_login", "*")),
+        last_seen=_safe_html(user.get("last_seen", "*")),
+    )
+    return text, _admin_menu(locale)
+
+
+_ADMIN_SECTION_RENDERERS: dict[str, Callable[[str, list[str]], _AdminRendered]] = {
+    "live": _render_admin_live,
+    "refresh": _render_admin_live,
+    "users": _render_admin_users,
+    "events": _render_admin_events,
+    "errors": _render_admin_errors,
+    "find_help": _render_admin_find_help,
+    "compact": _render_admin_compact,
+    "user": _render_admin_user,
+}
+
+
 @router_main.callback_query(F.data.startswith("admin:"))
 async def admin_callbacks(callback: types.CallbackQuery) -> None:
     locale = _resolve_locale(callback.from_user)
@@ -768,7 +1244,7 @@ async def admin_callbacks(callback: types.CallbackQuery) -> None:
     action = callback.data.split(":", maxsplit=2)
     section = action[1] if len(action) > 1 else "refresh"
 
-    db_log_event(
+    _log_event(
         user_id=callback.from_user.id,
         username=callback.from_user.username,
         action="admin_viewed_section",
@@ -776,68 +1252,11 @@ async def admin_callbacks(callback: types.CallbackQuery) -> None:
         meta={"section": section},
     )
 
-    if section in {"live", "refresh"}:
-        await callback.message.edit_text(
-            _format_live_summary(locale),
-            parse_mode="HTML",
-            reply_markup=_admin_menu(locale),
-        )
-    elif section == "users":
-        text, markup = _format_users_page(locale)
+    renderer = _ADMIN_SECTION_RENDERERS.get(section)
+    rendered = renderer(locale, action) if renderer is not None else None
+    if rendered is not None:
+        text, markup = rendered
         await callback.message.edit_text(text, parse_mode="HTML", reply_markup=markup)
-    elif section == "events":
-        await callback.message.edit_text(
-            _format_events_page(locale), parse_mode="HTML", reply_markup=_admin_menu(locale)
-        )
-    elif section == "errors":
-        await callback.message.edit_text(
-            _format_events_page(locale, status="error"),
-            parse_mode="HTML",
-            reply_markup=_admin_menu(locale),
-        )
-    elif section == "find_help":
-        await callback.message.edit_text(
-            _t(locale, "admin.find.help"),
-            parse_mode="HTML",
-            reply_markup=_admin_menu(locale),
-        )
-    elif section == "compact":
-        removed = db_compact_events(keep_last=2000)
-        await callback.message.edit_text(
-            _t(locale, "admin.compact.done", removed=removed),
-            parse_mode="HTML",
-            reply_markup=_admin_menu(locale),
-        )
-    elif section == "user" and len(action) == 3:
-        user_key = action[2]
-        found = db_find_user(user_key)
-        if found:
-            key, user = found
-            username = _safe_html(user.get("username", "None"))
-            fullname = _safe_html(user.get("fullname", "*"))
-            role = _safe_html(user.get("role", "member"))
-            first_login = _safe_html(user.get("first_login", "*"))
-            last_seen = _safe_html(user.get("last_seen", "*"))
-            await callback.message.edit_text(
-                _t(
-                    locale,
-                    "admin.user.card",
-                    key=_safe_html(key),
-                    username=username,
-                    fullname=fullname,
-                    role=role,
-                    first_login=first_login,
-                    last_seen=last_seen,
-                ),
-                parse_mode="HTML",
-                reply_markup=_admin_menu(locale),
-            )
-        else:
-            await callback.message.edit_text(
-                _t(locale, "admin.find.not_found"),
-                parse_mode="HTML",
-                reply_markup=_admin_menu(locale),
-            )
 
     await callback.answer()
 
@@ -847,41 +1266,53 @@ async def link_check(message: types.Message) -> None:
     if not message.from_user:
         return
 
+    # Stickers, media and service messages carry no text to look for a link in.
+    if not message.text:
+        return
+
     user_id = message.from_user.id
     username = message.from_user.username
     fullname = message.from_user.first_name
-    db_register(user_id, username, fullname)
-    _resolve_locale(message.from_user)
+    if _needs_register(user_id, username, fullname):
+        await asyncio.to_thread(db_register, user_id, username, fullname)
+        _mark_registered(user_id, username, fullname)
+    locale = _resolve_locale(message.from_user)
+    await handle_post_link(message, locale)
 
-    try:
-        await handle_post_link(message)
-    except Exception as exc:
-        logger.exception("Message handling failed: %s", exc)
-        db_log_event(
-            user_id=user_id,
-            username=username,
-            action="runtime_error",
-            status="error",
-            meta={"error": str(exc)[:200]},
-        )
+
+@router_main.errors()
+async def handle_runtime_error(event: types.ErrorEvent) -> None:
+    exc = event.exception
+    error = f"{type(exc).__name__}: {exc}"[:200]
+    logger.error("Update handling failed: %s", error, exc_info=exc)
+    user = getattr(event.update.event, "from_user", None)
+    if user is None:
+        return
+    _log_event(
+        user_id=user.id,
+        username=user.username,
+        action="runtime_error",
+        status="error",
+        meta={"error": error},
+    )
 
 
-async def handle_post_link(message: types.Message) -> None:
+async def handle_post_link(message: types.Message, locale: str) -> None:
     if not message.from_user:
         return
 
     user_id = message.from_user.id
     username = message.from_user.username
-    cid = uuid.uuid4().hex[:8]
-    locale = _resolve_locale(message.from_user)
+    cid = f"{next(_capture_ids):08x}"
 
-    url = validate_tg_link(message.text or "")
-    db_log_event(
+    text = message.text or ""
+    url = validate_tg_link(text)
+    _log_event(
         user_id=user_id,
         username=username,
         action="link_received",
         status="ok" if url else "error",
-        meta={"text": (message.text or "")[:200]},
+        meta={"text": text[:200]},
     )
 
     if not url:
@@ -892,9 +1323,9 @@ async def handle_post_link(message: types.Message) -> None:
         )
         return
 
-    retry_after = await _rate_limit_retry_after(user_id)
+    retry_after = _rate_limit_retry_after(user_id)
     if retry_after > 0:
-        db_log_event(
+        _log_event(
             user_id=user_id,
             username=username,
             action="capture_rate_limited",
@@ -906,7 +1337,7 @@ async def handle_post_link(message: types.Message) -> None:
 
     queue_slot_acquired = await _acquire_capture_slot()
     if not queue_slot_acquired:
-        db_log_event(
+        _log_event(
             user_id=user_id,
             username=username,
             action="capture_queue_overload",
@@ -919,7 +1350,7 @@ async def handle_post_link(message: types.Message) -> None:
         await message.answer(_t(locale, "user.queue_overloaded"))
         return
 
-    is_first_image = await _consume_first_image_flag()
+    is_first_image = _consume_first_image_flag()
     try:
         if is_first_image:
             await message.answer(_t(locale, "user.first_image.warning"))
@@ -929,10 +1360,9 @@ async def handle_post_link(message: types.Message) -> None:
 
         if result:
             filename, data = result
-            await progress_message.edit_text(_t(locale, "progress.sending"))
             await message.answer_document(BufferedInputFile(data, filename=filename))
-            await progress_message.edit_text(_t(locale, "progress.sent"))
-            db_log_event(
+            _spawn_background(progress_message.edit_text(_t(locale, "progress.sent")))
+            _log_event(
                 user_id=user_id,
                 username=username,
                 action="capture_success",
@@ -940,8 +1370,8 @@ async def handle_post_link(message: types.Message) -> None:
                 meta={"url": url},
             )
         else:
-            await progress_message.edit_text(_t(locale, "progress.failed"))
-            db_log_event(
+            _spawn_background(progress_message.edit_text(_t(locale, "progress.failed")))
+            _log_event(
                 user_id=user_id,
                 username=username,
                 action="capture_failed",
@@ -949,4 +1379,4 @@ async def handle_post_link(message: types.Message) -> None:
                 meta={"url": url},
             )
     finally:
-        _capture_queue_slots.release()
+        _release_capture_slot()
@@ -2,9 +2,11 @@ import asyncio
 import logging
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.types import BotCommand
 
-from bot.main import preflight_driver_startup, router_main
+from bot.main import preflight_driver_startup, router_main, stop_event_writer
 from config import get_settings
 
 
@@ -15,7 +17,13 @@ async def main() -> None:
         format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
     )
 
-    bot = Bot(token=settings.bot.bot_token)
+    # One aiohttp session (and its keep-alive pool) serves every API call; it
+    # can point at a self-hosted Bot API server closer to the users.
+    if settings.bot.api_base_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.bot.api_base_url))
+    else:
+        session = AiohttpSession()
+    bot = Bot(token=settings.bot.bot_token, session=session)
     await bot.set_my_commands(
         commands=[
             BotCommand(command="start", description="Start bot"),
@@ -27,7 +35,11 @@ async def main() -> None:
 
     await preflight_driver_startup()
     await bot.delete_webhook(drop_pending_updates=True)
-    await dispatcher.start_polling(bot)
+    try:
+        await dispatcher.start_polling(bot)
+    finally:
+        await stop_event_writer()
+        await bot.session.close()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
@@ -10,6 +11,21 @@ PROJECT_ROOT = Path(__file__).resolve().parent
 DEFAULT_DB_PATH = PROJECT_ROOT / "database" / "database.json"
 DEFAULT_CHROMEDRIVER_DIR = PROJECT_ROOT / "chromedriver"
 ENV_PATH = PROJECT_ROOT / ".env"
+_ENV_KEYS = (
+    "BOT_TOKEN",
+    "LOG_LEVEL",
+    "ADMIN_IDS",
+    "SUPPORTED_LOCALES",
+    "DEFAULT_LOCALE",
+    "DATABASE_PATH",
+    "CHROMEDRIVER_DIR",
+    "CHROMEDRIVER_PATH",
+    "CHROME_BINARY",
+    "TELEGRAM_API_URL",
+)
+_ADMIN_ID_RE = re.compile(r"-?\d+")
+# Comma-separated ids; empty items and surrounding whitespace are allowed.
+_ADMIN_IDS_RE = re.compile(r"\s*(?:-?\d+\s*)?(?:,\s*(?:-?\d+\s*)?)*")
 
 
 @dataclass(frozen=True)
@@ -19,6 +35,7 @@ class BotSettings:
     log_level: str
     default_locale: str
     supported_locales: tuple[str, ...]
+    api_base_url: str | None
 
 
 @dataclass(frozen=True)
@@ -40,6 +57,7 @@ class Settings:
     storage: StorageSettings
 
 
+@lru_cache(maxsize=None)
 def _load_env_file(path: Path) -> None:
     if not path.exists():
         return
@@ -73,15 +91,12 @@ def _parse_admin_ids(value: str | None) -> set[int]:
     if not value:
         return set()
 
-    parsed: set[int] = set()
-    for raw_part in value.split(","):
-        part = raw_part.strip()
-        if not part:
-            continue
-        if not part.lstrip("-").isdigit():
-            raise RuntimeError(f"Invalid ADMIN_IDS: '{part}' is not a number.")
-        parsed.add(int(part))
-    return parsed
+    if _ADMIN_IDS_RE.fullmatch(value) is None:
+        for raw_part in value.split(","):
+            part = raw_part.strip()
+            if part and _ADMIN_ID_RE.fullmatch(part) is None:
+                raise RuntimeError(f"Invalid ADMIN_IDS: '{part}' is not a number.")
+    return set(map(int, _ADMIN_ID_RE.findall(value)))
 
 
 def _parse_supported_locales(value: str | None) -> tuple[str, ...]:
@@ -101,25 +116,26 @@ def _parse_supported_locales(value: str | None) -> tuple[str, ...]:
 
 def load_settings(*, require_bot_token: bool = True) -> Settings:
     _load_env_file(ENV_PATH)
+    env = {key: _normalize_optional(os.environ.get(key)) for key in _ENV_KEYS}
 
-    bot_token = os.getenv("BOT_TOKEN", "").strip()
+    bot_token = env["BOT_TOKEN"] or ""
     if require_bot_token and not bot_token:
         raise RuntimeError("Environment variable BOT_TOKEN is not set.")
 
-    log_level = os.getenv("LOG_LEVEL", "INFO").strip().upper() or "INFO"
-    admin_ids = _parse_admin_ids(_normalize_optional(os.getenv("ADMIN_IDS")))
-    supported_locales = _parse_supported_locales(_normalize_optional(os.getenv("SUPPORTED_LOCALES")))
-    default_locale = (_normalize_optional(os.getenv("DEFAULT_LOCALE")) or "en").lower()
+    log_level = (env["LOG_LEVEL"] or "INFO").upper()
+    admin_ids = _parse_admin_ids(env["ADMIN_IDS"])
+    supported_locales = _parse_supported_locales(env["SUPPORTED_LOCALES"])
+    default_locale = (env["DEFAULT_LOCALE"] or "en").lower()
     if default_locale not in supported_locales:
         default_locale = "en" if "en" in supported_locales else supported_locales[0]
 
-    db_env = _normalize_optional(os.getenv("DATABASE_PATH"))
+    db_env = env["DATABASE_PATH"]
     database_path = Path(db_env).expanduser() if db_env else DEFAULT_DB_PATH
 
-    chromedriver_dir_env = _normalize_optional(os.getenv("CHROMEDRIVER_DIR"))
+    chromedriver_dir_env = env["CHROMEDRIVER_DIR"]
     chromedriver_dir = Path(chromedriver_dir_env).expanduser() if chromedriver_dir_env else DEFAULT_CHROMEDRIVER_DIR
 
-    chromedriver_override = _normalize_optional(os.getenv("CHROMEDRIVER_PATH"))
+    chromedriver_override = env["CHROMEDRIVER_PATH"]
     if chromedriver_override and not Path(chromedriver_override).exists():
         chromedriver_override = None
 
@@ -130,9 +146,10 @@ def load_settings(*, require_bot_token: bool = True) -> Settings:
             log_level=log_level,
             default_locale=default_locale,
             supported_locales=supported_locales,
+            api_base_url=env["TELEGRAM_API_URL"],
         ),
         driver=DriverSettings(
-            chrome_binary=_normalize_optional(os.getenv("CHROME_BINARY")),
+            chrome_binary=env["CHROME_BINARY"],
             chromedriver_dir=chromedriver_dir,
             chromedriver_path_override=chromedriver_override,
         ),
@@ -145,9 +162,12 @@ def get_settings() -> Settings:
     return load_settings(require_bot_token=True)
 
 
+@lru_cache(maxsize=1)
 def get_runtime_settings() -> Settings:
     return load_settings(require_bot_token=False)
 
 
 def reset_settings_cache() -> None:
     get_settings.cache_clear()
+    get_runtime_settings.cache_clear()
+    _load_env_file.cache_clear()
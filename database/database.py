@@ -1,21 +1,43 @@
 from __future__ import annotations
 
+import atexit
+import heapq
 import json
+import mmap
+import os
 import re
 import threading
-from dataclasses import dataclass
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Callable
+from types import MappingProxyType
+from typing import Any, BinaryIO, Callable, Iterable, Mapping
 
 from aiogram import types
 from aiogram.filters import BaseFilter
 
 from config import get_runtime_settings
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 PREFIX = "tsp_"
 LEGACY_PREFIX = "tps_"
+_USERNAME_RE = re.compile(r"[a-zA-Z0-9_]+")
+_ACTION_STATS = {"capture_success": "capture_success", "capture_failed": "capture_failed"}
 MAX_DB_SIZE_BYTES = 10 * 1024 * 1024
+# Users/stats writes inside this window are coalesced into a single save.
+SAVE_DEBOUNCE_SECONDS = 0.5
+# Only the newest events stay in memory; the sidecar file keeps the history.
+EVENTS_MEMORY_LIMIT = 2000
+# Larger files are parsed straight from a read-only mapping (orjson only).
+MMAP_MIN_BYTES = 1024 * 1024
+ROLE_CACHE_TTL_SECONDS = 30.0
+ROLE_CACHE_MAX_USERS = 4096
 DEFAULT_USER = {
     "username": "None",
     "fullname": "*",
@@ -26,7 +48,25 @@ DEFAULT_USER = {
 }
 
 
-@dataclass(frozen=True)
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_pretty(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    return json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _json_dumps_line(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(payload, ensure_ascii=False, default=asdict).encode("utf-8") + b"\n"
+
+
+@dataclass(frozen=True, slots=True)
 class EventRecord:
     timestamp: str
     user_id: int
@@ -36,34 +76,95 @@ class EventRecord:
     meta: dict[str, Any]
 
 
+# In-memory events are EventRecord when appended at runtime and plain dicts
+# when read back from disk; both encode to the same JSON line.
+StoredEvent = EventRecord | dict[str, Any]
+
+
+def _event_as_dict(event: StoredEvent) -> dict[str, Any]:
+    if isinstance(event, EventRecord):
+        return {
+            "timestamp": event.timestamp,
+            "user_id": event.user_id,
+            "username": event.username,
+            "action": event.action,
+            "status": event.status,
+            "meta": event.meta,
+        }
+    return event.copy()
+
+
 class Database:
     def __init__(self, filename: str | Path | None = None) -> None:
         if filename is None:
             filename = get_runtime_settings().storage.database_path
         self.filename = Path(filename)
+        # Events are append-only, so they live in a JSON Lines sidecar and the
+        # main file only carries users and stats.
+        self.events_filename = self.filename.with_suffix(".events.ndjson")
         self.filename.parent.mkdir(parents=True, exist_ok=True)
         self._lock = threading.RLock()
+        self._events_fh: BinaryIO | None = None
+        self._dirty = False
+        self._flush_timer: threading.Timer | None = None
         self.data: dict[str, Any] = {}
-        self.load_data()
+        # Stale records can share a username, so each name maps to all its keys.
+        self._by_username: dict[str, set[str]] = {}
+        self._event_count = 0
+        # Parsed on first access, so importing the module does no disk I/O.
+        self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load_data()
 
     def load_data(self) -> None:
         with self._lock:
-            if not self.filename.exists():
+            self._loaded = True
+            self._close_events_file()
+            if not self.filename.exists() and not self.events_filename.exists():
                 self.data = self._default_structure()
+                self._by_username = {}
+                self._event_count = 0
                 return
 
-            try:
-                loaded = json.loads(self.filename.read_text(encoding="utf-8"))
-            except (json.JSONDecodeError, OSError):
-                loaded = {}
+            loaded: Any = {}
+            if self.filename.exists():
+                try:
+                    loaded = self._read_main_file()
+                except (ValueError, OSError):
+                    loaded = {}
 
             self.data = self._normalize_structure(loaded)
+            self._by_username = {}
+            for key, user in self.data["users"].items():
+                self._reindex_username(key, None, user)
+            legacy_events = self.data["events"]
+            if self.events_filename.exists():
+                self.data["events"], self._event_count = self._read_events_file()
+            else:
+                self.data["events"] = deque(legacy_events, maxlen=EVENTS_MEMORY_LIMIT)
+                self._event_count = len(legacy_events)
+                if legacy_events:
+                    # Legacy format migration: events were stored in the main file.
+                    self._rewrite_events_file(legacy_events)
+                    self.save_data()
+
+    def _read_main_file(self) -> Any:
+        with self.filename.open("rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if orjson is None or size < MMAP_MIN_BYTES:
+                return _json_loads(fh.read())
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
 
     @staticmethod
     def _default_structure() -> dict[str, Any]:
         return {
             "users": {},
-            "events": [],
+            "events": deque(maxlen=EVENTS_MEMORY_LIMIT),
             "stats": {
                 "capture_success": 0,
                 "capture_failed": 0,
@@ -98,6 +199,12 @@ class Database:
         stats = loaded.get("stats")
         if isinstance(stats, dict):
             normalized["stats"].update(stats)
+            # Counters are ints from here on, so increments need no casts.
+            for name in ("capture_success", "capture_failed", "admin_views"):
+                try:
+                    normalized["stats"][name] = int(normalized["stats"][name])
+                except (TypeError, ValueError):
+                    normalized["stats"][name] = 0
 
         return normalized
 
@@ -113,30 +220,145 @@ class Database:
             normalized_users[normalized_key] = value
         return normalized_users
 
+    @staticmethod
+    def _username_index_key(user: Any) -> str | None:
+        username = user.get("username") if isinstance(user, dict) else None
+        if not isinstance(username, str) or username in {"", "None"}:
+            return None
+        return username.lower()
+
+    def _reindex_username(self, key: str, old: Any, new: Any) -> None:
+        old_name = self._username_index_key(old)
+        new_name = self._username_index_key(new)
+        if old_name == new_name:
+            return
+        if old_name is not None:
+            keys = self._by_username.get(old_name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_username[old_name]
+        if new_name is not None:
+            self._by_username.setdefault(new_name, set()).add(key)
+
     def save_data(self) -> None:
-        payload = json.dumps(self.data, indent=4, ensure_ascii=False)
+        with self._lock:
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self._save_now()
+                self._dirty = False
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._close_events_file()
+
+    def _save_now(self) -> None:
+        state = {"users": self.data.get("users", {}), "stats": self.data.get("stats", {})}
         tmp_path = self.filename.with_suffix(self.filename.suffix + ".tmp")
-        tmp_path.write_text(payload, encoding="utf-8")
+        tmp_path.write_bytes(_json_dumps_pretty(state))
         tmp_path.replace(self.filename)
 
+    def _read_events_file(self) -> tuple[deque[StoredEvent], int]:
+        # Count every line but only parse the ones that stay in memory.
+        tail: deque[bytes] = deque(maxlen=EVENTS_MEMORY_LIMIT)
+        count = 0
+        try:
+            with self.events_filename.open("rb") as fh:
+                for line in fh:
+                    if line.strip():
+                        tail.append(line)
+                        count += 1
+        except OSError:
+            pass
+
+        events: deque[StoredEvent] = deque(maxlen=EVENTS_MEMORY_LIMIT)
+        for line in tail:
+            try:
+                event = _json_loads(line)
+            except ValueError:
+                # Torn line, e.g. after a crash mid-write.
+                count -= 1
+                continue
+            if isinstance(event, dict):
+                events.append(event)
+        return events, count
+
+    def _events_file(self) -> BinaryIO:
+        if self._events_fh is None:
+            needs_newline = False
+            try:
+                with self.events_filename.open("rb") as fh:
+                    fh.seek(-1, 2)
+                    needs_newline = fh.read(1) != b"\n"
+            except OSError:
+                pass
+            self._events_fh = self.events_filename.open("ab")
+            if needs_newline:
+                self._events_fh.write(b"\n")
+        return self._events_fh
+
+    def _close_events_file(self) -> None:
+        if self._events_fh is not None:
+            self._events_fh.close()
+            self._events_fh = None
+
+    def _rewrite_events_file(self, events: Iterable[StoredEvent]) -> None:
+        self._write_events_lines(_json_dumps_line(event) for event in events)
+
+    def _write_events_lines(self, lines: Iterable[bytes]) -> None:
+        self._close_events_file()
+        tmp_path = self.events_filename.with_suffix(self.events_filename.suffix + ".tmp")
+        with tmp_path.open("wb") as fh:
+            fh.writelines(lines)
+        tmp_path.replace(self.events_filename)
+
+    def _read_events_tail(self, keep_last: int) -> list[bytes]:
+        tail: deque[bytes] = deque(maxlen=keep_last)
+        with self.events_filename.open("rb") as fh:
+            for line in fh:
+                if line.strip():
+                    tail.append(line if line.endswith(b"\n") else line + b"\n")
+        kept: list[bytes] = []
+        for line in tail:
+            try:
+                _json_loads(line)
+            except ValueError:
+                continue
+            kept.append(line)
+        return kept
+
     def users(self) -> dict[str, dict[str, Any]]:
         with self._lock:
+            self._ensure_loaded()
             users = self.data.setdefault("users", {})
             if not isinstance(users, dict):
                 users = {}
                 self.data["users"] = users
             return users
 
-    def events(self) -> list[dict[str, Any]]:
+    def events(self) -> deque[StoredEvent]:
         with self._lock:
-            events = self.data.setdefault("events", [])
-            if not isinstance(events, list):
-                events = []
+            self._ensure_loaded()
+            events = self.data.setdefault("events", deque(maxlen=EVENTS_MEMORY_LIMIT))
+            if not isinstance(events, deque):
+                events = deque(maxlen=EVENTS_MEMORY_LIMIT)
                 self.data["events"] = events
             return events
 
     def stats(self) -> dict[str, Any]:
         with self._lock:
+            self._ensure_loaded()
             stats = self.data.setdefault("stats", {})
             if not isinstance(stats, dict):
                 stats = {}
@@ -145,6 +367,7 @@ class Database:
 
     def users_snapshot(self) -> dict[str, dict[str, Any]]:
         with self._lock:
+            self._ensure_loaded()
             users = self.data.setdefault("users", {})
             if not isinstance(users, dict):
                 users = {}
@@ -153,31 +376,59 @@ class Database:
 
     def events_snapshot(self) -> list[dict[str, Any]]:
         with self._lock:
-            events = self.data.setdefault("events", [])
-            if not isinstance(events, list):
-                events = []
-                self.data["events"] = events
-            return [event.copy() if isinstance(event, dict) else {} for event in events]
+            return [_event_as_dict(event) for event in self.events()]
 
     def stats_snapshot(self) -> dict[str, Any]:
         with self._lock:
+            self._ensure_loaded()
             stats = self.data.setdefault("stats", {})
             if not isinstance(stats, dict):
                 stats = {}
                 self.data["stats"] = stats
             return stats.copy()
 
+    def users_view(self) -> Mapping[str, dict[str, Any]]:
+        # Read-only and not copied; callers must not mutate the user dicts.
+        return MappingProxyType(self.users())
+
+    def event_count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return self._event_count
+
+    def recent_events(self, limit: int, *, status: str | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            self._ensure_loaded()
+            result: list[dict[str, Any]] = []
+            for event in reversed(self.events()):
+                if len(result) >= limit:
+                    break
+                event_status = event.status if isinstance(event, EventRecord) else event.get("status")
+                if status and event_status != status:
+                    continue
+                result.append(_event_as_dict(event))
+            return result
+
     def insert_user(self, key: str, value: dict[str, Any]) -> None:
         with self._lock:
+            self._ensure_loaded()
             users = self.data.setdefault("users", {})
             if not isinstance(users, dict):
                 users = {}
                 self.data["users"] = users
+            self._reindex_username(key, users.get(key), value)
             users[key] = value
             self.save_data()
 
-    def update_user(self, key: str, updater: Callable[[dict[str, Any]], dict[str, Any]]) -> None:
+    def update_user(
+        self,
+        key: str,
+        updater: Callable[[dict[str, Any]], dict[str, Any]],
+        *,
+        events: list[EventRecord] | None = None,
+    ) -> None:
         with self._lock:
+            self._ensure_loaded()
             users = self.data.setdefault("users", {})
             if not isinstance(users, dict):
                 users = {}
@@ -186,10 +437,14 @@ class Database:
             user_data = base.copy() if isinstance(base, dict) else DEFAULT_USER.copy()
             updated = updater(user_data)
             users[key] = updated if isinstance(updated, dict) else user_data
+            self._reindex_username(key, base, users[key])
+            if events:
+                self._append_events_locked(events)
             self.save_data()
 
     def get_user(self, key: str) -> dict[str, Any] | None:
         with self._lock:
+            self._ensure_loaded()
             users = self.data.setdefault("users", {})
             if not isinstance(users, dict):
                 users = {}
@@ -197,52 +452,111 @@ class Database:
             user = users.get(key)
             return user.copy() if isinstance(user, dict) else None
 
+    def recent_users(self, limit: int) -> list[tuple[str, dict[str, Any]]]:
+        with self._lock:
+            self._ensure_loaded()
+            latest = heapq.nlargest(
+                limit,
+                self.users().items(),
+                key=lambda item: str(item[1].get("last_seen", "")) if isinstance(item[1], dict) else "",
+            )
+            return [(key, user.copy() if isinstance(user, dict) else {}) for key, user in latest]
+
+    def find_user_by_username(self, username: str) -> tuple[str, dict[str, Any]] | None:
+        with self._lock:
+            self._ensure_loaded()
+            keys = self._by_username.get(username.lower())
+            if not keys:
+                return None
+            users = self.users()
+            if len(keys) == 1:
+                key = next(iter(keys))
+            else:
+                # Same first match as a scan in insertion order.
+                key = next(candidate for candidate in users if candidate in keys)
+            user = users.get(key)
+            return (key, user.copy()) if isinstance(user, dict) else None
+
     def delete_user(self, key: str) -> None:
         with self._lock:
+            self._ensure_loaded()
             users = self.data.setdefault("users", {})
             if not isinstance(users, dict):
                 users = {}
                 self.data["users"] = users
             if key in users:
-                del users[key]
+                self._reindex_username(key, users.pop(key), None)
                 self.save_data()
 
     def append_event(self, event: EventRecord) -> None:
+        self.append_events([event])
+
+    def append_events(self, batch: list[EventRecord]) -> None:
+        if not batch:
+            return
         with self._lock:
-            events = self.data.setdefault("events", [])
-            if not isinstance(events, list):
-                events = []
-                self.data["events"] = events
-            events.append(
-                {
-                    "timestamp": event.timestamp,
-                    "user_id": event.user_id,
-                    "username": event.username,
-                    "action": event.action,
-                    "status": event.status,
-                    "meta": event.meta,
-                }
-            )
-            self._update_stats_for_event(event)
-            self.save_data()
+            self._ensure_loaded()
+            # The sidecar append is already durable; only counters need a save.
+            if self._append_events_locked(batch):
+                self.save_data()
 
-    def _update_stats_for_event(self, event: EventRecord) -> None:
+    def _append_events_locked(self, batch: list[EventRecord]) -> bool:
+        events = self.events()
+        lines: list[bytes] = []
+        stats_changed = False
+        for event in batch:
+            # orjson encodes the slotted dataclass directly, no dict needed.
+            events.append(event)
+            lines.append(_json_dumps_line(event))
+            stats_changed |= self._update_stats_for_event(event)
+        fh = self._events_file()
+        fh.write(b"".join(lines))
+        fh.flush()
+        self._event_count += len(batch)
+        return stats_changed
+
+    def _update_stats_for_event(self, event: EventRecord) -> bool:
         stats = self.data.setdefault("stats", {})
         if not isinstance(stats, dict):
             stats = {}
             self.data["stats"] = stats
-        if event.action == "capture_success":
-            stats["capture_success"] = int(stats.get("capture_success", 0)) + 1
-        if event.action == "capture_failed":
-            stats["capture_failed"] = int(stats.get("capture_failed", 0)) + 1
-        if event.action.startswith("admin_"):
-            stats["admin_views"] = int(stats.get("admin_views", 0)) + 1
+        stat = _ACTION_STATS.get(event.action)
+        if stat is None:
+            if not event.action.startswith("admin_"):
+                return False
+            stat = "admin_views"
+        stats[stat] = stats.get(stat, 0) + 1
+        return True
+
+    def compact_events(self, keep_last: int) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            if self._event_count <= keep_last:
+                return 0
+            events = self.events()
+            if keep_last <= len(events):
+                while len(events) > keep_last:
+                    events.popleft()
+                self._rewrite_events_file(events)
+                kept = len(events)
+            else:
+                # Older events than the in-memory window must survive too, so
+                # take them from the file; the window stays as it is.
+                self._close_events_file()
+                lines = self._read_events_tail(keep_last)
+                self._write_events_lines(lines)
+                kept = len(lines)
+            removed = self._event_count - kept
+            self._event_count = kept
+            return removed
 
     def file_size_bytes(self) -> int:
         with self._lock:
-            if not self.filename.exists():
-                return 0
-            return self.filename.stat().st_size
+            size = 0
+            for path in (self.filename, self.events_filename):
+                if path.exists():
+                    size += path.stat().st_size
+            return size
 
     def db_size_warning_mb(self) -> float | None:
         size = self.file_size_bytes()
@@ -252,6 +566,7 @@ class Database:
 
 
 _db = Database()
+atexit.register(_db.close)
 
 
 def _get_key(user_id: int) -> str:
@@ -259,7 +574,7 @@ def _get_key(user_id: int) -> str:
 
 
 def _normalize_username(username: str | None) -> str:
-    if username and re.match(r"^[a-zA-Z0-9_]+$", username):
+    if username and _USERNAME_RE.fullmatch(username):
         return username
     return "None"
 
@@ -268,11 +583,24 @@ def _normalize_fullname(fullname: str | None) -> str:
     return fullname if fullname else "*"
 
 
+_iso_second_cache: tuple[int, str] = (-1, "")
+
+
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    # Format the date and time once per second; only the microseconds vary.
+    global _iso_second_cache
+    second, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_second, prefix = _iso_second_cache
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        _iso_second_cache = (second, prefix)
+    return f"{prefix}.{micros:06d}+00:00"
 
 
 def db_load() -> None:
+    # Persist pending debounced changes first so the reload does not drop them.
+    _db.flush()
+    _db.load_data()
     print(_db.data)
 
 
@@ -287,8 +615,49 @@ def db_register(user_id: int, username: str | None, fullname: str | None) -> Non
     _db.update_user(key, _updater)
 
 
+def db_touch_user(
+    user_id: int,
+    username: str | None,
+    fullname: str | None,
+    first_login: str,
+    *,
+    event: EventRecord | None = None,
+) -> None:
+    # db_register + first_login bookkeeping + event append in a single write.
+    key = _get_key(user_id)
+
+    def _updater(user_data: dict[str, Any]) -> dict[str, Any]:
+        user_data["username"] = _normalize_username(username)
+        user_data["fullname"] = _normalize_fullname(fullname)
+        user_data["last_seen"] = _now_iso()
+        if user_data.get("first_login", "*") == "*":
+            user_data["first_login"] = first_login
+        return user_data
+
+    _db.update_user(key, _updater, events=[event] if event else None)
+
+
+_delete_hooks: list[Callable[[int], None]] = []
+
+
+def db_on_delete(hook: Callable[[int], None]) -> None:
+    # Lets callers drop their own per-user caches when a user is deleted.
+    _delete_hooks.append(hook)
+
+
+_locale_hooks: list[Callable[[int], None]] = []
+
+
+def db_on_locale_change(hook: Callable[[int], None]) -> None:
+    # Called after a user's stored locale is written, by any caller.
+    _locale_hooks.append(hook)
+
+
 def db_delete(user_id: int) -> None:
     _db.delete_user(_get_key(user_id))
+    _role_cache.pop(user_id, None)
+    for hook in _delete_hooks:
+        hook(user_id)
 
 
 def db_info(user_id: int) -> dict[str, Any] | None:
@@ -302,11 +671,28 @@ def db_change(user_id: int, subject: str, value: Any) -> None:
         return user_data
 
     _db.update_user(key, _updater)
+    _role_cache.pop(user_id, None)
+    if subject == "locale":
+        for hook in _locale_hooks:
+            hook(user_id)
+
+
+_role_cache: dict[int, tuple[str, float]] = {}
 
 
 def db_role(user_id: int) -> str:
+    # IsUser runs on every message; skip the locked user copy for a while.
+    now = time.monotonic()
+    cached = _role_cache.get(user_id)
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
     user_data = _db.get_user(_get_key(user_id)) or DEFAULT_USER
-    return str(user_data.get("role", "member"))
+    role = str(user_data.get("role", "member"))
+    if len(_role_cache) >= ROLE_CACHE_MAX_USERS:
+        _role_cache.clear()
+    _role_cache[user_id] = (role, now + ROLE_CACHE_TTL_SECONDS)
+    return role
 
 
 def db_get_value(user_id: int, field: str) -> Any:
@@ -330,6 +716,26 @@ def db_set_locale(user_id: int, locale: str) -> None:
         return user_data
 
     _db.update_user(key, _updater)
+    for hook in _locale_hooks:
+        hook(user_id)
+
+
+def db_build_event(
+    *,
+    user_id: int,
+    username: str | None,
+    action: str,
+    status: str,
+    meta: dict[str, Any] | None = None,
+) -> EventRecord:
+    return EventRecord(
+        timestamp=_now_iso(),
+        user_id=user_id,
+        username=_normalize_username(username),
+        action=action,
+        status=status,
+        meta=meta or {},
+    )
 
 
 def db_log_event(
@@ -341,53 +747,39 @@ def db_log_event(
     meta: dict[str, Any] | None = None,
 ) -> None:
     _db.append_event(
-        EventRecord(
-            timestamp=_now_iso(),
-            user_id=user_id,
-            username=_normalize_username(username),
-            action=action,
-            status=status,
-            meta=meta or {},
-        )
+        db_build_event(user_id=user_id, username=username, action=action, status=status, meta=meta)
     )
 
 
+def db_log_events(events: list[EventRecord]) -> None:
+    _db.append_events(events)
+
+
 def db_recent_users(limit: int = 10) -> list[tuple[str, dict[str, Any]]]:
-    users = list(_db.users_snapshot().items())
-    users.sort(key=lambda item: str(item[1].get("last_seen", "")), reverse=True)
-    return users[:limit]
+    return _db.recent_users(limit)
 
 
 def db_recent_events(limit: int = 20, *, status: str | None = None) -> list[dict[str, Any]]:
-    events = _db.events_snapshot()
-    if status:
-        events = [event for event in events if event.get("status") == status]
-    return list(reversed(events[-limit:]))
+    return _db.recent_events(limit, status=status)
 
 
 def db_stats() -> dict[str, Any]:
     stats = _db.stats_snapshot()
-    stats["total_users"] = len(_db.users_snapshot())
-    stats["total_events"] = len(_db.events_snapshot())
+    stats["total_users"] = len(_db.users_view())
+    stats["total_events"] = _db.event_count()
     return stats
 
 
 def db_find_user(query: str) -> tuple[str, dict[str, Any]] | None:
     query = query.strip()
-    users = _db.users_snapshot()
 
     if query.isdigit():
         key = _get_key(int(query))
-        user = users.get(key)
-        if isinstance(user, dict):
-            return key, user.copy()
+        user = _db.get_user(key)
+        if user is not None:
+            return key, user
 
-    needle = query.lower().lstrip("@")
-    for key, user in users.items():
-        username = str(user.get("username", "")).lower()
-        if username == needle:
-            return key, user.copy()
-    return None
+    return _db.find_user_by_username(query.lstrip("@"))
 
 
 def db_size_warning() -> str | None:
@@ -401,19 +793,8 @@ def db_size_warning_mb() -> float | None:
     return _db.db_size_warning_mb()
 
 
-def db_compact_events(keep_last: int = 2000) -> int:
-    with _db._lock:
-        events = _db.data.setdefault("events", [])
-        if not isinstance(events, list):
-            events = []
-            _db.data["events"] = events
-        if keep_last < 1:
-            keep_last = 1
-        removed = max(len(events) - keep_last, 0)
-        if removed:
-            _db.data["events"] = events[-keep_last:]
-            _db.save_data()
-        return removed
+def db_compact_events(keep_last: int = EVENTS_MEMORY_LIMIT) -> int:
+    return _db.compact_events(max(keep_last, 1))
 
 
 class IsUser(BaseFilter):